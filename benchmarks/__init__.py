@@ -0,0 +1,69 @@
+"""
+Benchmarks for Rest Framework Docs. Run them from the root of the
+repository, ie.
+
+    python -m benchmarks.swagger_tree
+"""
+import time
+
+
+def setup_django(**options):
+    """
+    Configures minimal Django settings so the documentation
+    generators can be imported outside of a project
+    """
+    from django.conf import settings
+    if not settings.configured:
+        defaults = {
+            'INSTALLED_APPS': ('rest_framework', 'rest_framework_docs'),
+            'DATABASES': {'default': {'ENGINE': 'django.db.backends.sqlite3',
+                                      'NAME': ':memory:'}},
+            'ROOT_URLCONF': None,
+        }
+        defaults.update(options)
+        settings.configure(**defaults)
+
+
+def measure(func, repeat=3):
+    """ Returns the best wall time of func over repeat runs, in seconds """
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def report(name, count, seconds):
+    print("%-40s n=%-6d %10.2f ms %10.2f us/item" % (
+        name, count, seconds * 1000, seconds * 1000000 / count))
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Approximates the memory held by an object graph in bytes, following
+    containers, instance dictionaries and slots. Classes are not counted
+    """
+    import sys
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, type):
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+    if hasattr(obj, '__dict__'):
+        size += deep_sizeof(obj.__dict__, seen)
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if hasattr(obj, name):
+                size += deep_sizeof(getattr(obj, name), seen)
+    return size
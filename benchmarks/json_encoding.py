@@ -0,0 +1,49 @@
+"""
+Compares encoding documentation objects with jsonpickle (the former
+encoder, if installed) against every available encoding backend
+"""
+from benchmarks import setup_django, measure, report
+
+setup_django()
+
+from rest_framework_docs.docs import ApiDocObject
+from rest_framework_docs.encoding import AVAILABLE_BACKENDS, encode
+
+try:
+    import jsonpickle
+except ImportError:
+    jsonpickle = None
+
+
+def make_docs(count):
+    docs = []
+    for i in range(count):
+        doc = ApiDocObject()
+        doc.path = "resource%d/{pk}" % i
+        doc.title = "Resource %d Details" % i
+        doc.description = "Gets a detailed view of an individual record. " * 4
+        doc.params = [["horse", "the name of your horse"]]
+        doc.allowed_methods = ["GET", "PUT", "DELETE", "OPTIONS"]
+        doc.model = "Resource%d" % i
+        doc.fields = [
+            {"field%d" % j: {"type": " Char Field", "read_only": False,
+                             "default": None, "max_length": 25, "min_length": None}}
+            for j in range(8)
+        ]
+        docs.append(doc)
+    return docs
+
+
+def main():
+    for count in (100, 1000, 10000):
+        docs = make_docs(count)
+        if jsonpickle is not None:
+            report("jsonpickle", count,
+                   measure(lambda: jsonpickle.encode(docs, unpicklable=False)))
+        for name in sorted(AVAILABLE_BACKENDS):
+            report("as_dict + %s" % name, count,
+                   measure(lambda: encode([doc.as_dict() for doc in docs], backend=name)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Reports the memory held per endpoint by documentation objects and
+swagger Api trees, next to an equivalent object using a __dict__
+"""
+from benchmarks import setup_django, deep_sizeof
+
+setup_django()
+
+from rest_framework_docs.docs import ApiDocObject
+from rest_framework_docs.swagger import Api, SwaggerOperationObject, SwaggerParameter
+
+
+class DictApiDocObject(object):
+    """ ApiDocObject as it was before it used __slots__ """
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def doc_kwargs(i):
+    return dict(
+        path="resource%d/{pk}" % i,
+        title="Resource %d Details" % i,
+        description="Gets a detailed view of an individual record.",
+        params=[["horse", "the name of your horse"]],
+        allowed_methods=["GET", "PUT", "DELETE", "OPTIONS"],
+        model="Resource%d" % i,
+        fields=None,
+    )
+
+
+def make_swagger_tree(count):
+    base_api = Api(path="/")
+    for i in range(count):
+        resource = Api(path="resource%d" % i)
+        base_api.add_child(resource)
+        api = Api(path="{pk}")
+        for method in ("GET", "PUT", "DELETE"):
+            operation = SwaggerOperationObject(method=method, summary="Summary of %s" % method)
+            operation.add_parameter(SwaggerParameter(param_type="path", data_type="int", name="pk"))
+            operation.add_parameter(SwaggerParameter(param_type="query", data_type="string", name="q"))
+            api.operations.append(operation)
+        resource.add_child(api)
+    return base_api
+
+
+def main():
+    count = 1000
+    for name, cls in (("ApiDocObject (__dict__)", DictApiDocObject),
+                      ("ApiDocObject (__slots__)", ApiDocObject)):
+        docs = [cls(**doc_kwargs(i)) for i in range(count)]
+        print("%-40s %10.0f bytes/endpoint" % (name, deep_sizeof(docs) / float(count)))
+
+    tree = make_swagger_tree(count)
+    print("%-40s %10.0f bytes/endpoint" % ("swagger Api tree", deep_sizeof(tree) / float(count)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Compares introspecting endpoints one by one against thread and process
+pools of growing size. Threads only help the parts of the introspection
+which release the GIL; forked processes scale with the number of cores
+"""
+import multiprocessing
+from benchmarks import measure, report
+from benchmarks.synthetic import clear_memoized, make_urlpatterns
+
+from rest_framework_docs.docs import DocumentationGenerator
+
+
+def generate(urlpatterns, workers, executor):
+    clear_memoized()
+    DocumentationGenerator(urlpatterns, workers=workers, executor=executor).get_docs(as_objects=True)
+
+
+def main():
+    count = 5000
+    urlpatterns = make_urlpatterns(count, shared_serializers=0)
+    baseline = measure(lambda: generate(urlpatterns, None, None), repeat=1)
+    report("sequential", count, baseline)
+
+    cores = multiprocessing.cpu_count()
+    workers = sorted(set([2, 4, cores]))
+    for executor in ('thread', 'process'):
+        for count_workers in workers:
+            seconds = measure(lambda: generate(urlpatterns, count_workers, executor), repeat=1)
+            report("%s pool, %d workers (x%.1f)" % (executor, count_workers, baseline / seconds),
+                   count, seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Compares the per-endpoint cost of cleaning URL pattern regexes with
+uncompiled re.sub calls against the memoizing PathNormalizer
+"""
+import re
+from benchmarks import setup_django, measure, report
+
+setup_django()
+
+from rest_framework_docs.paths import PathNormalizer
+
+PATTERNS = [
+    r'^resource%d/?$',
+    r'^resource%d/(?P<pk>[^/]+)/?$',
+    r'^resource%d/(?P<pk>\d+)/children/(?P<child>[0-9]+)/?$',
+]
+
+
+def get_patterns(count):
+    return [re.compile(PATTERNS[i % len(PATTERNS)] % (i // len(PATTERNS)))
+            for i in range(count)]
+
+
+def clean_uncompiled(regexes):
+    for regex in regexes:
+        cleaned = regex.pattern
+        cleaned = re.sub('\([^<]*<', '{', cleaned)
+        cleaned = re.sub('>[^\)]*\)', '}', cleaned)
+        cleaned = re.sub('^\^|/\??\$$', '', cleaned)
+        cleaned = re.sub('\$$', '', cleaned)
+        re.compile(regex.pattern).groupindex
+
+
+def clean_normalizer(normalizer, regexes):
+    for regex in regexes:
+        normalizer.get_path(regex.pattern)
+        normalizer.get_parameters(regex)
+
+
+def main():
+    for count in (100, 1000, 10000):
+        regexes = get_patterns(count)
+        report("uncompiled re.sub", count, measure(lambda: clean_uncompiled(regexes)))
+        report("PathNormalizer (cold)", count,
+               measure(lambda: clean_normalizer(PathNormalizer(), regexes)))
+        warm = PathNormalizer()
+        clean_normalizer(warm, regexes)
+        report("PathNormalizer (memoized)", count,
+               measure(lambda: clean_normalizer(warm, regexes)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Generates the documentation of synthetic URLconfs of growing size and
+reports, for each, the time spent generating the endpoints' documentation,
+building and encoding the swagger documentation and encoding the JSON
+documentation, and the peak memory of each generator. Save the results
+and compare later runs against them to catch regressions:
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --compare baseline.json
+
+Each generator of each scenario runs in its own process, so that its
+peak memory and its memoized introspection start from scratch
+"""
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+from optparse import OptionParser
+from benchmarks import measure
+from benchmarks.synthetic import (clear_memoized, install_urlconf, make_urlpatterns,
+                                  nest_urlpatterns)
+
+from rest_framework_docs.docs import DocumentationGenerator
+from rest_framework_docs.encoding import encode
+from rest_framework_docs.swagger import SwaggerDocumentationGenerator
+
+SIZES = (100, 1000, 10000)
+
+# (name, make_urlpatterns arguments)
+SERIALIZERS = (
+    ('shared', {'shared_serializers': 10}),
+    ('distinct', {'shared_serializers': 0}),
+)
+
+METRICS = ('generation', 'json_encoding', 'docs_peak_memory',
+           'swagger_build', 'swagger_encoding', 'swagger_peak_memory')
+
+
+def get_peak_memory():
+    """ Gets the peak resident memory of the process in kilobytes """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak //= 1024  # bytes on OS X
+    return peak
+
+
+def install_scenario(count, serializers):
+    install_urlconf(nest_urlpatterns(make_urlpatterns(
+        count, paragraphs=4, params=6, mapped_every=20, **serializers)))
+
+
+def measure_docs(count, serializers, repeat):
+    """
+    Measures the DocumentationGenerator on the scenario's URLconf.
+    Every run starts without memoized introspection
+    """
+    install_scenario(count, serializers)
+    start_memory = get_peak_memory()
+    results = {}
+
+    def generate():
+        clear_memoized()
+        results['docs'] = DocumentationGenerator().get_docs(as_objects=True)
+    results['generation'] = measure(generate, repeat)
+    docs = results.pop('docs')
+    results['json_encoding'] = measure(lambda: encode([doc.as_dict() for doc in docs]), repeat)
+
+    results['docs_peak_memory'] = get_peak_memory() - start_memory
+    results['endpoints'] = len(docs)
+    return results
+
+
+def measure_swagger(count, serializers, repeat):
+    """
+    Measures the SwaggerDocumentationGenerator on the scenario's URLconf.
+    Every run starts without memoized introspection
+    """
+    install_scenario(count, serializers)
+    start_memory = get_peak_memory()
+    results = {}
+
+    def build_swagger():
+        clear_memoized()
+        results['swagger'] = SwaggerDocumentationGenerator(lazy=False)
+    results['swagger_build'] = measure(build_swagger, repeat)
+    swagger = results.pop('swagger')
+
+    def encode_swagger():
+        swagger._documents.clear()
+        swagger.get_docs()
+        for api in swagger.base_api.children:
+            swagger.get_docs(api.path)
+    results['swagger_encoding'] = measure(encode_swagger, repeat)
+
+    results['swagger_peak_memory'] = get_peak_memory() - start_memory
+    results['resources'] = len(swagger.base_api.children)
+    return results
+
+
+def _run_in_process(queue, func, *args):
+    queue.put(func(*args))
+
+
+def run_in_process(func, *args):
+    """ Gets the results of func run in a process of its own """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_in_process, args=(queue, func) + args)
+    process.start()
+    results = queue.get()
+    process.join()
+    return results
+
+
+def run(sizes, repeat):
+    scenarios = []
+    for count in sizes:
+        for name, serializers in SERIALIZERS:
+            results = {'name': "%d endpoints, %s serializers" % (count, name)}
+            for func in (measure_docs, measure_swagger):
+                results.update(run_in_process(func, count, serializers, repeat))
+            scenarios.append(results)
+            print_scenario(results)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scenarios': scenarios,
+    }
+
+
+def format_metric(metric, value):
+    if metric.endswith('peak_memory'):
+        return "%10d KB" % value
+    return "%10.1f ms" % (value * 1000)
+
+
+def print_scenario(results):
+    print("%s (%d documented, %d swagger resources)" % (
+        results['name'], results['endpoints'], results['resources']))
+    for metric in METRICS:
+        print("    %-20s %s" % (metric, format_metric(metric, results[metric])))
+
+
+def compare(results, baseline, tolerance):
+    """
+    Prints how each metric changed since the baseline results and
+    returns the number of metrics which grew by more than tolerance
+    """
+    previous = dict((scenario['name'], scenario) for scenario in baseline['scenarios'])
+    regressions = 0
+    print("\nCompared to the baseline (python %s):" % baseline['python'])
+    for scenario in results['scenarios']:
+        if scenario['name'] not in previous:
+            continue
+        print(scenario['name'])
+        for metric in METRICS:
+            if metric not in previous[scenario['name']]:
+                continue  # not measured by the baseline's version of the suite
+            before, after = previous[scenario['name']][metric], scenario[metric]
+            change = float(after - before) / before if before else 0.0
+            flag = ""
+            if change > tolerance:
+                flag = "  REGRESSION"
+                regressions += 1
+            print("    %-20s %s -> %s %+7.1f%%%s" % (
+                metric, format_metric(metric, before), format_metric(metric, after),
+                change * 100, flag))
+    return regressions
+
+
+def main():
+    parser = OptionParser(usage="python -m benchmarks.suite [options]")
+    parser.add_option('--sizes', default=','.join(str(size) for size in SIZES),
+                      help='Comma separated numbers of endpoints. Default: %default')
+    parser.add_option('--repeat', type='int', default=3,
+                      help='Runs of each measure, the best one is kept. Default: %default')
+    parser.add_option('--save', help='File to save the results to, as JSON')
+    parser.add_option('--compare', help='File of saved results to compare against')
+    parser.add_option('--tolerance', type='float', default=0.1,
+                      help='Growth of a metric reported as a regression. Default: %default')
+    options, args = parser.parse_args()
+
+    results = run([int(size) for size in options.sizes.split(',')], options.repeat)
+    if options.save:
+        with open(options.save, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+    if options.compare:
+        with open(options.compare) as baseline:
+            if compare(results, json.load(baseline), options.tolerance):
+                sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""
+Builds swagger Api trees of growing size. Time per endpoint should stay
+flat as the number of resources grows, since child lookups are indexed
+"""
+from benchmarks import setup_django, measure, report
+
+setup_django()
+
+from rest_framework_docs.swagger import Api
+
+
+def build_tree(resources, endpoints_per_resource=2):
+    base_api = Api(path="/")
+    for i in range(resources):
+        for j in range(endpoints_per_resource):
+            path = "resource%d" % i
+            child = base_api.get_child(path)
+            if not child:
+                child = Api(path=path)
+                base_api.add_child(child)
+            child.add_child(Api(path="{pk%d}" % j))
+    return base_api
+
+
+def main():
+    for resources in (100, 1000, 10000):
+        seconds = measure(lambda: build_tree(resources))
+        report("swagger Api tree", resources * 2, seconds)
+
+
+if __name__ == '__main__':
+    main()
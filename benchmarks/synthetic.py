@@ -0,0 +1,162 @@
+"""
+Synthetic Django REST Framework URL patterns for the benchmarks
+"""
+from benchmarks import setup_django
+
+setup_django()
+
+import sys
+import types
+from django.conf import settings
+from django.conf.urls import include, url
+from rest_framework import generics, serializers
+from rest_framework.urlpatterns import format_suffix_patterns
+from rest_framework_docs.paths import path_normalizer
+
+DOCSTRING = """
+    Gets a detailed view of an individual record %d. Can be updated and
+    deleted. Each record must be assigned to a parent record.
+
+    GET: Gets the record
+    PUT: Updates the record
+
+    horse -- the name of your horse
+    colour -- query, string, the colour of the horse, optional
+    """
+
+PARAGRAPH = """
+    Records are kept for as long as their parent record exists, and are
+    listed in the order they were created. Filtering by colour or by
+    horse narrows the list down; both filters may be combined.
+    """
+
+PARAM = """
+    filter%d -- query, string, narrows the records down by attribute %d, optional"""
+
+# Values substituted for the {kind} parameter of the views which have
+# param_mappings, each giving its own swagger resource
+KINDS = ['red', 'green', 'blue']
+
+
+def make_serializer(i, field_count=8):
+    attrs = dict(('field%d' % j, serializers.CharField(max_length=25))
+                 for j in range(field_count))
+    attrs['__module__'] = __name__
+    return type('Serializer%d' % i, (serializers.Serializer,), attrs)
+
+
+def make_docstring(i, paragraphs=0, params=0):
+    """
+    Gets the docstring of view i, with extra paragraphs of description
+    and extra parameters for long docstrings
+    """
+    docstring = DOCSTRING % i
+    return (docstring[:docstring.index("\n    GET")] + PARAGRAPH * paragraphs +
+            docstring[docstring.index("\n    GET"):].rstrip() +
+            ''.join(PARAM % (j, j) for j in range(params)) + "\n    ")
+
+
+def make_view(i, serializer_class, base=generics.ListCreateAPIView, docstring=None,
+              param_mappings=None):
+    attrs = {
+        '__doc__': docstring or DOCSTRING % i,
+        '__module__': __name__,
+        'serializer_class': serializer_class,
+    }
+    if param_mappings:
+        attrs['param_mappings'] = param_mappings
+    return type('View%d' % i, (base,), attrs)
+
+
+def make_urlpatterns(count, shared_serializers=10, paragraphs=0, params=0, mapped_every=0):
+    """
+    Creates count URL patterns, alternating list and detail endpoints.
+    Views share shared_serializers serializer classes; 0 gives each
+    view its own serializer.
+
+    paragraphs, params -- Extra description paragraphs and parameters in each docstring
+    mapped_every -- Gives every nth resource a {kind} parameter expanded
+    by the view's param_mappings. Default: none
+    """
+    serializer_classes = [make_serializer(i) for i in range(shared_serializers or count)]
+    urlpatterns = []
+    for i in range(count):
+        serializer_class = serializer_classes[i % len(serializer_classes)]
+        docstring = make_docstring(i, paragraphs, params)
+        resource = 'resource%d' % (i // 2)
+        param_mappings = None
+        if mapped_every and (i // 2) % mapped_every == 0:
+            resource = '(?P<kind>[a-z]+)-' + resource
+            param_mappings = {'kind': KINDS}
+        if i % 2:
+            view = make_view(i, serializer_class, generics.RetrieveUpdateDestroyAPIView,
+                             docstring, param_mappings)
+            regex = r'^%s/(?P<pk>\d+)/?$' % resource
+        else:
+            view = make_view(i, serializer_class, docstring=docstring,
+                             param_mappings=param_mappings)
+            regex = r'^%s/?$' % resource
+        urlpatterns.append(url(regex, view.as_view(), name='resource_%d' % i))
+    return urlpatterns
+
+
+def nest_urlpatterns(urlpatterns, depth=2, fanout=10, format_suffixes=True):
+    """
+    Spreads the URL patterns over depth levels of include()s, each
+    including fanout others, the way large projects include their
+    applications' URLconfs. The patterns of a resource stay in the same
+    include, as they would in an application. format_suffixes adds the
+    .json style variants Django REST Framework's format_suffix_patterns
+    creates
+    """
+    if format_suffixes:
+        urlpatterns = format_suffix_patterns(urlpatterns)
+    return _nest_resources(group_resources(urlpatterns), depth, fanout)
+
+
+def group_resources(urlpatterns):
+    """
+    Splits the URL patterns into lists of consecutive patterns of the
+    same resource, ie. the first segment of their path
+    """
+    groups = []
+    for pattern in urlpatterns:
+        resource = path_normalizer.get_route(pattern.regex.pattern)[0].split('/')[0]
+        if groups and groups[-1][0] == resource:
+            groups[-1][1].append(pattern)
+        else:
+            groups.append((resource, [pattern]))
+    return [patterns for resource, patterns in groups]
+
+
+def _nest_resources(groups, depth, fanout):
+    if depth <= 0 or len(groups) <= fanout:
+        return [pattern for patterns in groups for pattern in patterns]
+    size = -(-len(groups) // fanout)
+    return [
+        url(r'^v%d/' % (start // size),
+            include(_nest_resources(groups[start:start + size], depth - 1, fanout)))
+        for start in range(0, len(groups), size)
+    ]
+
+
+def install_urlconf(urlpatterns, name='benchmarks_urlconf'):
+    """
+    Makes the URL patterns the project's ROOT_URLCONF, so that the
+    generators collect them as they would in a project
+    """
+    module = types.ModuleType(name)
+    module.urlpatterns = urlpatterns
+    sys.modules[name] = module
+    settings.ROOT_URLCONF = name
+
+
+def clear_memoized():
+    """ Empties the memoized introspection results, for cold runs """
+    from rest_framework_docs import docs
+    docs._serializer_fields.clear()
+    docs._field_type_labels.clear()
+    docs._allowed_methods.clear()
+    docs._parsed_docstrings.clear()
+    path_normalizer._paths.clear()
+    path_normalizer._parameters.clear()
@@ -23,6 +23,10 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cigar_example.settings")
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
 
+# Generate the API documentation before it is first requested
+from rest_framework_docs.cache import prewarm_docs
+prewarm_docs()
+
 # Apply WSGI middleware here.
 # from helloworld.wsgi import HelloWorldApplication
 # application = HelloWorldApplication(application)
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import urllib
+from django.http import Http404
+from django.utils.cache import patch_vary_headers
+from compression import ENCODINGS, FILE_SUFFIXES, choose_encoding, compress
+from index import DocumentationIndex
+from responses import conditional_response
+
+
+class DocumentationBuild(object):
+    """
+    Reads and writes the documentation files produced ahead of time
+    by the build_api_docs management command. The directory holds the
+    rendered HTML page, the swagger resource listing and one JSON file
+    per swagger resource
+    """
+
+    HTML_FILE = 'index.html'
+    JSON_FILE = 'docs.json'
+    SWAGGER_FILE = 'swagger.json'
+    SWAGGER_DIR = 'swagger'
+
+    # Content hashes of the files served so far, by filename
+    _etags = {}
+    # Indexes of the JSON documentation loaded so far, by filename
+    _indexes = {}
+
+    def __init__(self, build_dir):
+        self.build_dir = build_dir
+
+    def html_filename(self):
+        return os.path.join(self.build_dir, self.HTML_FILE)
+
+    def swagger_filename(self, path=None):
+        """
+        Gets the file of the swagger resource listing, or of a
+        single resource when its path is given
+        """
+        if not path:
+            return os.path.join(self.build_dir, self.SWAGGER_FILE)
+        name = urllib.quote(path, safe='') + '.json'
+        return os.path.join(self.build_dir, self.SWAGGER_DIR, name)
+
+    def json_filename(self):
+        return os.path.join(self.build_dir, self.JSON_FILE)
+
+    def write_json(self, content):
+        self._write(self.json_filename(), content)
+
+    def get_index(self):
+        """
+        Gets a DocumentationIndex over the JSON documentation,
+        loaded again whenever the file changes
+        """
+        filename = self.json_filename()
+        try:
+            with open(filename, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                validators = (stat.st_mtime, stat.st_size)
+                cached = self._indexes.get(filename)
+                if cached and cached[0] == validators:
+                    return cached[1]
+                index = DocumentationIndex(json.load(f))
+        except (IOError, OSError):
+            raise Http404
+        self._indexes[filename] = (validators, index)
+        return index
+
+    def write_html(self, content):
+        self._write_compressed(self.html_filename(), content)
+
+    def write_swagger(self, content, path=None):
+        self._write_compressed(self.swagger_filename(path), content)
+
+    def serve_html(self, request):
+        return self._serve(request, self.html_filename(), 'text/html; charset=utf-8')
+
+    def serve_swagger(self, request, path=None):
+        return self._serve(request, self.swagger_filename(path), 'application/json')
+
+    def _write(self, filename, content):
+        """
+        Writes through a temporary file, so that a running server never
+        reads a half written document
+        """
+        directory = os.path.dirname(filename)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        if isinstance(content, unicode):
+            content = content.encode('utf-8')
+        temp_filename = filename + '.tmp'
+        with open(temp_filename, 'wb') as f:
+            f.write(content)
+        os.rename(temp_filename, filename)
+
+    def _write_compressed(self, filename, content):
+        """
+        Writes the content along with its compressed variants
+        """
+        self._write(filename, content)
+        for encoding in ENCODINGS:
+            self._write(filename + FILE_SUFFIXES[encoding], compress(content, encoding))
+
+    def _serve(self, request, filename, content_type):
+        # the best compressed variant which was built and is accepted
+        built = [encoding for encoding in ('br', 'gzip')
+                 if os.path.exists(filename + FILE_SUFFIXES[encoding])]
+        encoding = choose_encoding(request, built)
+        if encoding is not None:
+            filename += FILE_SUFFIXES[encoding]
+
+        try:
+            with open(filename, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                content = f.read()
+        except (IOError, OSError):
+            raise Http404
+
+        validators = (stat.st_mtime, stat.st_size)
+        cached = self._etags.get(filename)
+        if cached and cached[0] == validators:
+            etag = cached[1]
+        else:
+            etag = hashlib.md5(content).hexdigest()
+            self._etags[filename] = (validators, etag)
+
+        response = conditional_response(request, content, content_type,
+                                        etag=etag, last_modified=stat.st_mtime)
+        if encoding is not None and response.status_code == 200:
+            response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
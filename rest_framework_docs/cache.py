@@ -0,0 +1,474 @@
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from django.core.cache import get_cache
+from django.template.loader import render_to_string
+from compression import PrecompressedDocument
+from docs import DocumentationGenerator, get_code_fingerprint
+from swagger import SwaggerDocumentationGenerator
+from conf import get_setting
+from index import DocumentationIndex
+from profiling import GenerationProfile
+
+logger = logging.getLogger('rest_framework_docs')
+
+
+class DocumentationCache(object):
+    """
+    Keeps the documentation generated by a DocumentationGenerator so the
+    URL patterns are only introspected once per process instead of on
+    every request. If the CACHE_BACKEND setting names a Django cache, the
+    documentation is stored there as well, which allows several processes
+    to share one build and to be invalidated together.
+
+    The documentation is kept along with the fingerprint of each endpoint,
+    so refresh() only regenerates the endpoints which changed.
+
+    With the SERVE_STALE setting, the previous documentation keeps being
+    served after an invalidation or a cache expiry while revalidate()
+    generates the new one in the background.
+
+    With the SHARED_BUILD setting, the documentation in the Django cache
+    is keyed by a fingerprint of the code, so that all the hosts running
+    the same code share it, and a CacheLock lets a single process
+    generate it. The others serve the documentation they had, or the one
+    generated for the previous code, or else wait for it
+    """
+
+    # seconds between two checks of a process waiting for another one
+    # to store the documentation
+    poll_interval = 0.1
+
+    def __init__(self, generator_class=DocumentationGenerator):
+        self.generator_class = generator_class
+        self._entries = None
+        self._docs = None
+        self._version = None
+        self._index = None
+        self._html = None
+        self._revalidating = False
+        self._revalidate_again = False
+        self._fingerprint = None
+        # True when the backend could not hold the documentation
+        self._uncached = False
+        self._lock = threading.RLock()
+
+    def get_docs(self):
+        """
+        Gets the documentation as a list of objects, generating it on
+        the first call and after every invalidation
+        """
+        backend = self.get_backend()
+        with self._lock:
+            if backend is None:
+                if self._docs is None:
+                    self._set_entries(self.generate())
+                return self._docs
+            if self._uncached:
+                return self._docs
+            if get_setting('SHARED_BUILD'):
+                return self._get_shared_docs(backend)
+
+            version = backend.get(self._key('version'))
+            if version is not None:
+                if version == self._version and self._docs is not None:
+                    return self._docs
+                entries = backend.get(self._key('docs'))
+                if entries is not None:
+                    if self._docs is None and get_setting('INCREMENTAL'):
+                        # first request of this process, ie. after a restart
+                        # by the autoreloader: the cached docs may be stale
+                        return self._update(backend, entries, version)
+                    self._set_entries(entries, version)
+                    return self._docs
+
+            if self._docs is not None and get_setting('SERVE_STALE'):
+                # the version stays missing until the running revalidation
+                # stores it, only invalidate() asks for another one
+                if not self._revalidating:
+                    self.revalidate()
+                return self._docs
+            self._store(backend, self.generate())
+            return self._docs
+
+    def _get_shared_docs(self, backend):
+        """
+        Gets the documentation of the running code from the backend, or
+        generates and stores it if this process gets the build lock
+        """
+        while True:
+            version = backend.get(self._key('version'))
+            if version is not None:
+                if version == self._version and self._docs is not None:
+                    return self._docs
+                entries = backend.get(self._key('docs'))
+                if entries is not None:
+                    self._set_entries(entries, version)
+                    return self._docs
+
+            if self._build_shared(backend, self._entries):
+                return self._docs
+
+            # another process is generating it
+            if self._docs is None:
+                latest = backend.get(self._key('latest'))
+                if latest is not None and latest != self.get_code_fingerprint():
+                    entries = backend.get(self._key('docs', latest))
+                    if entries is not None:
+                        self._set_entries(entries)
+            if self._docs is not None:
+                return self._docs
+            time.sleep(self.poll_interval)
+
+    def _build_shared(self, backend, previous=None):
+        """
+        Generates and stores the documentation if this process gets the
+        build lock, and returns whether it did
+        """
+        lock = CacheLock(backend, self._key('lock'), get_setting('BUILD_LOCK_TIMEOUT'))
+        if not lock.acquire():
+            return False
+        try:
+            entries = self.generate(previous)
+            with self._lock:
+                self._store(backend, entries)
+        finally:
+            lock.release()
+        return True
+
+    def get_code_fingerprint(self):
+        """
+        Gets the fingerprint of the documented code (see
+        get_code_fingerprint), computed once until the next refresh
+        or invalidation
+        """
+        with self._lock:
+            if self._fingerprint is None:
+                self._fingerprint = get_code_fingerprint(self.generator_class().urlpatterns)
+            return self._fingerprint
+
+    def get_index(self):
+        """
+        Gets a DocumentationIndex over the documentation, built
+        once per version of the documentation
+        """
+        docs = self.get_docs()
+        with self._lock:
+            if self._index is None or self._index[0] is not docs:
+                self._index = (docs, DocumentationIndex.from_objects(docs))
+            return self._index[1]
+
+    def get_html_document(self):
+        """
+        Gets the documentation page, rendered without a request context,
+        as a PrecompressedDocument. It is rendered once per version of
+        the documentation
+        """
+        docs = self.get_docs()
+        with self._lock:
+            if self._html is None or self._html[0] is not docs:
+                content = render_to_string("rest_framework_docs/docs.html", {'docs': docs})
+                if isinstance(content, unicode):
+                    content = content.encode('utf-8')
+                # a hash of the page itself, which also depends on the template
+                etag = hashlib.md5(content).hexdigest()
+                self._html = (docs, PrecompressedDocument(content, 'text/html; charset=utf-8', etag))
+            return self._html[1]
+
+    def refresh(self):
+        """
+        Regenerates the documentation of the endpoints which changed
+        since it was generated, reusing the rest
+        """
+        backend = self.get_backend()
+        with self._lock:
+            self._fingerprint = None
+            entries = self._entries
+            if backend is None:
+                self._set_entries(self.generate(entries))
+                return
+            version = self._version
+            if entries is None:
+                version = backend.get(self._key('version'))
+                entries = backend.get(self._key('docs'))
+            self._update(backend, entries, version)
+
+    def invalidate(self):
+        """
+        Drops the cached documentation so it is generated again on the
+        next call to get_docs()
+        """
+        backend = self.get_backend()
+        with self._lock:
+            if backend is not None:
+                backend.delete(self._key('version'))
+                backend.delete(self._key('docs'))
+            self._fingerprint = None
+            if self._docs is not None and get_setting('SERVE_STALE'):
+                self.revalidate()
+                return
+            self._entries = None
+            self._docs = None
+            self._version = None
+            self._uncached = False
+
+    def revalidate(self):
+        """
+        Generates the documentation again in a background thread and
+        swaps it in when it is done. Until then the current documentation
+        is served. A call during a revalidation makes it generate the
+        documentation once more when it is done
+        """
+        with self._lock:
+            if self._revalidating:
+                self._revalidate_again = True
+            else:
+                self._revalidating = True
+                self._revalidate_again = False
+                start_thread(self._revalidate)
+
+    def _revalidate(self):
+        try:
+            again = True
+            while again:
+                backend = self.get_backend()
+                if backend is not None and get_setting('SHARED_BUILD'):
+                    # skipped when another process holds the lock, get_docs()
+                    # picks up what it stores
+                    self._build_shared(backend)
+                else:
+                    entries = self.generate()
+                    with self._lock:
+                        if backend is None:
+                            self._set_entries(entries)
+                        else:
+                            self._store(backend, entries)
+                with self._lock:
+                    again = self._revalidate_again
+                    self._revalidate_again = False
+                    self._revalidating = again
+        except Exception:
+            with self._lock:
+                self._revalidating = False
+            raise
+
+    def generate(self, previous=None):
+        """
+        Generates the (fingerprint, ApiDocObject) pairs of the endpoints,
+        reusing the objects of previous pairs with the same fingerprint
+        """
+        profile = GenerationProfile() if get_setting('PROFILE') else None
+        generator = self.generator_class(workers=get_setting('WORKERS'), profile=profile)
+        entries = generator.update_docs(dict(previous or []))
+        if profile is not None:
+            profile.report(generator)
+        return entries
+
+    def _update(self, backend, entries, version):
+        updated = self.generate(entries)
+        if entries is not None and version is not None and \
+                [f for f, doc in updated] == [f for f, doc in entries]:
+            self._set_entries(entries, version)
+        else:
+            self._store(backend, updated)
+        return self._docs
+
+    def _store(self, backend, entries):
+        version = uuid.uuid4().hex
+        timeout = get_setting('CACHE_TIMEOUT')
+        backend.set(self._key('docs'), entries, timeout)
+        if backend.get(self._key('docs')) is None:
+            # ie. larger than memcached's item size. Publishing the version
+            # would make every process rebuild the docs on every request
+            logger.warning("The documentation could not be stored in the %s cache, "
+                           "it is kept in process memory only", get_setting('CACHE_BACKEND'))
+            self._set_entries(entries)
+            self._uncached = True
+            return
+        backend.set(self._key('version'), version, timeout)
+        if get_setting('SHARED_BUILD'):
+            # served by the processes waiting for the next code's documentation
+            backend.set(self._key('latest'), self.get_code_fingerprint(), timeout)
+        self._set_entries(entries, version)
+
+    def _set_entries(self, entries, version=None):
+        self._entries = entries
+        self._uncached = False
+        self._docs = sorted((doc for fingerprint, doc in entries), key=lambda doc: doc.path)
+        self._version = version
+
+    def get_backend(self):
+        """
+        Gets the Django cache named by the CACHE_BACKEND setting, if any
+        """
+        alias = get_setting('CACHE_BACKEND')
+        if alias is None:
+            return None
+        return get_cache(alias)
+
+    def _key(self, name, fingerprint=None):
+        """
+        Gets a backend key. With SHARED_BUILD, keys other than latest
+        are those of the running code's fingerprint by default
+        """
+        if fingerprint is None and name != 'latest' and get_setting('SHARED_BUILD'):
+            fingerprint = self.get_code_fingerprint()
+        if fingerprint is not None:
+            return '%s:%s:%s' % (get_setting('CACHE_KEY_PREFIX'), fingerprint, name)
+        return '%s:%s' % (get_setting('CACHE_KEY_PREFIX'), name)
+
+
+class CacheLock(object):
+    """
+    Lock shared by all the processes using a Django cache, relying on
+    cache.add() only setting keys which do not exist. It expires after
+    timeout seconds, so that a process dying while holding it does not
+    block the others for good
+    """
+
+    def __init__(self, backend, key, timeout):
+        self.backend = backend
+        self.key = key
+        self.timeout = timeout
+        self.token = uuid.uuid4().hex
+
+    def acquire(self):
+        """ Takes the lock if it is free, and returns whether it did """
+        return self.backend.add(self.key, self.token, self.timeout)
+
+    def release(self):
+        """ Frees the lock, unless it expired and was taken by another process """
+        if self.backend.get(self.key) == self.token:
+            self.backend.delete(self.key)
+
+
+docs_cache = DocumentationCache()
+_swagger_generator = None
+_swagger_lock = threading.Lock()
+# number of the latest background regeneration of the swagger generator
+_swagger_revalidation = 0
+
+
+def get_cached_docs():
+    """ Gets the documentation objects from the process-wide cache """
+    return docs_cache.get_docs()
+
+
+def create_swagger_generator(urlpatterns=None, profile=None, lazy=None):
+    """
+    Creates a SwaggerDocumentationGenerator configured from the
+    SWAGGER_* settings
+
+    profile -- GenerationProfile to record timings in. Defaults to a
+    new one with the PROFILE setting
+    lazy -- Overrides the SWAGGER_LAZY setting
+    """
+    if profile is None and get_setting('PROFILE'):
+        profile = GenerationProfile()
+    if lazy is None:
+        lazy = get_setting('SWAGGER_LAZY')
+    return SwaggerDocumentationGenerator(
+        urlpatterns=urlpatterns,
+        base_path=get_setting('SWAGGER_BASE_PATH'),
+        server_url=get_setting('SWAGGER_SERVER_URL'),
+        docs_path=get_setting('SWAGGER_DOCS_PATH'),
+        lazy=lazy,
+        profile=profile,
+    )
+
+
+def get_swagger_generator():
+    """ Gets the process-wide SwaggerDocumentationGenerator """
+    global _swagger_generator
+    with _swagger_lock:
+        if _swagger_generator is None:
+            _swagger_generator = create_swagger_generator()
+        return _swagger_generator
+
+
+def start_thread(target, *args):
+    """
+    Runs target in a daemon thread, logging the exception it
+    raises if any
+    """
+    def run():
+        try:
+            target(*args)
+        except Exception:
+            logger.exception("Generating the documentation in the background failed")
+    thread = threading.Thread(target=run, name='rest_framework_docs')
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def prewarm_docs():
+    """
+    Generates the documentation in a background thread, so that it is
+    ready before the first request for it. Requests arriving before it
+    is done wait for it rather than generating it again. Does nothing
+    when the views serve the files of BUILD_DIR
+    """
+    if get_setting('BUILD_DIR'):
+        return None
+
+    def prewarm():
+        if get_setting('SNAPSHOT_FILE'):
+            from snapshot import get_snapshot
+            get_snapshot()
+        elif get_setting('CACHE_ENABLED'):
+            get_cached_docs()
+            if get_setting('PRECOMPRESS'):
+                docs_cache.get_html_document()
+            warm_swagger_generator(get_swagger_generator())
+    return start_thread(prewarm)
+
+
+def warm_swagger_generator(generator):
+    """
+    Encodes the resource listing and every resource of a swagger
+    generator, generating the resources it left for later when lazy
+    """
+    generator.get_document()
+    for resource in generator.base_api.children:
+        generator.get_document(resource.path)
+
+
+def refresh_docs():
+    """
+    Regenerates the documentation of the endpoints which changed, in the
+    process-wide documentation cache and swagger generator
+    """
+    docs_cache.refresh()
+    with _swagger_lock:
+        if _swagger_generator is not None:
+            _swagger_generator.refresh()
+
+
+def invalidate_docs():
+    """
+    Invalidates the process-wide documentation caches. With the
+    SERVE_STALE setting, the previous documentation is served until
+    the new one is generated in the background
+    """
+    global _swagger_generator, _swagger_revalidation
+    docs_cache.invalidate()
+    with _swagger_lock:
+        _swagger_revalidation += 1
+        if _swagger_generator is not None and get_setting('SERVE_STALE'):
+            start_thread(_revalidate_swagger_generator, _swagger_revalidation)
+        else:
+            _swagger_generator = None
+
+
+def _revalidate_swagger_generator(revalidation):
+    global _swagger_generator
+    generator = create_swagger_generator()
+    # served as soon as it is swapped in, so nothing is left to generate
+    warm_swagger_generator(generator)
+    with _swagger_lock:
+        # unless it was invalidated again meanwhile
+        if revalidation == _swagger_revalidation:
+            _swagger_generator = generator
@@ -0,0 +1,85 @@
+import gzip
+from StringIO import StringIO
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _gzip(content):
+    buf = StringIO()
+    # a fixed mtime keeps the output, and so its ETag, stable
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(content)
+    return buf.getvalue()
+
+
+COMPRESSORS = {
+    'gzip': _gzip,
+}
+if brotli is not None:
+    COMPRESSORS['br'] = brotli.compress
+
+# Content codings, by order of preference
+ENCODINGS = tuple(encoding for encoding in ('br', 'gzip') if encoding in COMPRESSORS)
+
+FILE_SUFFIXES = {
+    'gzip': '.gz',
+    'br': '.br',
+}
+
+
+def compress(content, encoding):
+    if isinstance(content, unicode):
+        content = content.encode('utf-8')
+    return COMPRESSORS[encoding](content)
+
+
+def choose_encoding(request, encodings=ENCODINGS):
+    """
+    Gets the preferred content coding among encodings which the
+    request's Accept-Encoding header accepts, or None
+    """
+    accepted = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        params = item.strip().split(';')
+        quality = 1.0
+        for param in params[1:]:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if params[0]:
+            accepted[params[0].strip().lower()] = quality
+
+    for encoding in encodings:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+class PrecompressedDocument(object):
+    """
+    A documentation payload which is served many times unchanged. Its
+    compressed variants are computed once, the first time each of
+    them is requested
+    """
+
+    def __init__(self, content, content_type, etag):
+        if isinstance(content, unicode):
+            content = content.encode('utf-8')
+        self.content = content
+        self.content_type = content_type
+        self.etag = etag
+        self._variants = {}
+
+    def get_variant(self, encoding):
+        """ Gets the content compressed with the given coding """
+        try:
+            return self._variants[encoding]
+        except KeyError:
+            variant = self._variants[encoding] = compress(self.content, encoding)
+            return variant
@@ -0,0 +1,70 @@
+from django.conf import settings
+
+DEFAULTS = {
+    # Keep the generated documentation in memory between requests
+    'CACHE_ENABLED': True,
+    # Name of a Django cache (ie. 'default') used to share the generated
+    # documentation between processes. None keeps it in process memory only
+    'CACHE_BACKEND': None,
+    'CACHE_TIMEOUT': None,
+    'CACHE_KEY_PREFIX': 'rest_framework_docs',
+    # Check the documentation found in CACHE_BACKEND against the code when a
+    # process starts, and only regenerate the endpoints which changed. Meant
+    # for development with a persistent cache, as runserver restarts often
+    'INCREMENTAL': False,
+    # Directory written by the build_api_docs management command. When set,
+    # the views serve the files found there instead of introspecting the API
+    'BUILD_DIR': None,
+    # Arguments of the SwaggerDocumentationGenerator used by the swagger view
+    # and the build_api_docs command
+    'SWAGGER_BASE_PATH': '',
+    'SWAGGER_SERVER_URL': '',
+    'SWAGGER_DOCS_PATH': '',
+    # Only generate a swagger resource when it is first requested
+    'SWAGGER_LAZY': True,
+    # Instantiate views which override allowed_methods to read it. Otherwise
+    # the allowed methods are derived from the view's handler methods
+    'INSTANTIATE_VIEWS': False,
+    # JSON library used to encode the documentation: 'json', 'ujson' or
+    # 'orjson'. None picks the fastest one installed
+    'JSON_BACKEND': None,
+    # Send the documentation page to the browser one endpoint at a time
+    'STREAMING': False,
+    # Default number of endpoints per page of the JSON documentation.
+    # None returns all of them
+    'PAGE_SIZE': None,
+    # Cache-Control header of the documentation responses, which all carry an
+    # ETag. ie. 'max-age=0, must-revalidate' or 'public, max-age=300'
+    'CACHE_CONTROL': None,
+    # Render the cached documentation page once, without a request context,
+    # and keep gzip (and brotli, if installed) versions of it
+    'PRECOMPRESS': False,
+    # Number of threads introspecting the endpoints when the cached
+    # documentation is generated. None introspects them one by one
+    'WORKERS': None,
+    # Time the stages of each generation and log a report to the
+    # rest_framework_docs.profiling logger (see also the docs_profiled signal)
+    'PROFILE': False,
+    # File holding the whole documentation, built once per host and
+    # memory-mapped by every process serving it (see build_api_docs)
+    'SNAPSHOT_FILE': None,
+    # After an invalidation or a cache expiry, keep serving the previous
+    # documentation while the new one is generated in the background
+    'SERVE_STALE': False,
+    # Key the documentation stored in CACHE_BACKEND by a fingerprint of the
+    # code and let a single process of all those sharing it generate it
+    'SHARED_BUILD': False,
+    # Seconds a process may hold the SHARED_BUILD lock before another
+    # one takes over
+    'BUILD_LOCK_TIMEOUT': 300,
+}
+
+
+def get_setting(name):
+    """
+    Gets a Rest Framework Docs setting. Values are read from the
+    REST_FRAMEWORK_DOCS dictionary of the project settings and fall
+    back on the defaults above
+    """
+    user_settings = getattr(settings, 'REST_FRAMEWORK_DOCS', {})
+    return user_settings.get(name, DEFAULTS[name])
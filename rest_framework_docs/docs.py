@@ -1,14 +1,65 @@
-import jsonpickle
+import hashlib
+import multiprocessing
+import os
 import sys
 import re
+import weakref
 from django.conf import settings
 from django.utils.importlib import import_module
 from rest_framework.views import APIView
 from django.core.urlresolvers import RegexURLResolver, RegexURLPattern
-from itertools import groupby
+from multiprocessing.pool import ThreadPool
+from rest_framework_docs import __version__
+from paths import path_normalizer
+from conf import get_setting
+from encoding import encode
 
 
-class DocumentationGenerator():
+class ApiDocObject(object):
+    """
+    API Documentation Object. Defined at module level so that it
+    can be pickled into a Django cache
+    """
+    __slots__ = ('path', 'title', 'description', 'params',
+                 'allowed_methods', 'model', 'fields')
+
+    def __init__(self,
+                 path=None,
+                 title=None,
+                 description=None,
+                 params=None,
+                 allowed_methods=None,
+                 model=None,
+                 fields=None):
+
+        self.path = path
+        self.title = title
+        self.description = description
+        self.params = params or []
+        self.allowed_methods = allowed_methods or []
+        self.model = model
+        self.fields = fields
+
+    def __getstate__(self):
+        return self.as_dict()
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def as_dict(self):
+        return {
+            "path": self.path,
+            "title": self.title,
+            "description": self.description,
+            "params": self.params,
+            "allowed_methods": self.allowed_methods,
+            "model": self.model,
+            "fields": self.fields
+        }
+
+
+class DocumentationGenerator(object):
     """
     Creates documentation for a list of URL patterns pointing to
     Django REST Framework v.2.0, 2.1.3 APIView instances. The
@@ -16,15 +67,32 @@ class DocumentationGenerator():
     the URL pattern objects, the view's serializers and other properties
     """
 
-    def __init__(self, urlpatterns=None):
+    # Number of endpoints introspected concurrently, and how: 'thread'
+    # or 'process'. Processes are forked, so only fit offline builds
+    workers = None
+    executor = 'thread'
+
+    # GenerationProfile recording the time spent in each stage
+    profile = None
+
+    def __init__(self, urlpatterns=None, workers=None, executor=None, profile=None):
         """
         Sets urlpatterns
         urlpatterns -- List of UrlPatterns
+        workers -- Number of endpoints to introspect concurrently. Default: 1
+        executor -- 'thread' (default) or 'process'
+        profile -- GenerationProfile to record timings in. Stages run in
+        forked processes are only recorded as a whole
         """
+        self.profile = profile
         if urlpatterns is None:
-            urlpatterns = self.get_url_patterns()
+            urlpatterns = self._profile('url_patterns', self.get_url_patterns)
 
         self.urlpatterns = urlpatterns
+        if workers is not None:
+            self.workers = workers
+        if executor is not None:
+            self.executor = executor
 
     def get_url_patterns(self):
 
@@ -32,47 +100,57 @@ class DocumentationGenerator():
         patterns = urls.urlpatterns
 
         api_url_patterns = []
-        patterns = self._flatten_patterns_tree(patterns)
-
-        for pattern in patterns:
+        for prefix, pattern in self._flatten_patterns_tree(patterns):
             # If this is a CBV, check if it is an APIView
             if (hasattr(pattern.callback, 'cls_instance') and
                 issubclass(pattern.callback.cls_instance.__class__, APIView)):
-                api_url_patterns.append(pattern)
+                api_url_patterns.append(prefix_pattern(prefix, pattern))
 
         # get only unique-named patterns, its, because rest_framework can add
         # additional patterns to distinguish format
         api_url_patterns = self._filter_unique_patterns(api_url_patterns)
         return api_url_patterns
 
-    def _flatten_patterns_tree(self, patterns):
+    def _flatten_patterns_tree(self, patterns, prefix=''):
         """
-        Uses recursion to flatten url tree
+        Walks the url tree depth first, without recursion, and yields
+        the url patterns in order along with the regex prefix of the
+        includes they are mounted under
 
         patterns - urlpatterns list
         """
-        pattern_list = []
-        for pattern in patterns:
-            if isinstance(pattern, RegexURLPattern):
-                pattern_list.append(pattern)
-            elif isinstance(pattern, RegexURLResolver):
-                pattern_list.extend(self._flatten_patterns_tree(pattern.url_patterns))
-        return pattern_list
+        stack = [(prefix, iter(patterns))]
+        while stack:
+            prefix, remaining = stack[-1]
+            for pattern in remaining:
+                if isinstance(pattern, RegexURLPattern):
+                    yield prefix, pattern
+                elif isinstance(pattern, RegexURLResolver):
+                    stack.append((join_regex(prefix, pattern.regex.pattern),
+                                  iter(pattern.url_patterns)))
+                    break
+            else:
+                stack.pop()
 
     def _filter_unique_patterns(self, patterns):
         """
-        Gets only unique patterns by its names
+        Gets the patterns unique by name and path, in a single pass. The
+        format suffix variants rest_framework adds (ie. cigars.json) are
+        left out for the pattern without the suffix
         """
         unique_patterns = []
-        # group patterns by its names
-        grouped_patterns = groupby(patterns, lambda pattern: pattern.name)
-        for name, group in grouped_patterns:
-            group_list = list(group)
-            # choose from group pattern with shortest regex
-            unique = min(group_list, key=lambda pattern: len(pattern.regex.pattern))
-            unique_patterns.append(unique)
+        positions = {}  # position in unique_patterns by (name, path)
+        for pattern in patterns:
+            path, is_variant = path_normalizer.get_route(pattern.regex.pattern)
+            key = (pattern.name, path)
+            position = positions.get(key)
+            if position is None:
+                positions[key] = len(unique_patterns)
+                unique_patterns.append((pattern, is_variant))
+            elif unique_patterns[position][1] and not is_variant:
+                unique_patterns[position] = (pattern, is_variant)
 
-        return unique_patterns
+        return [pattern for pattern, is_variant in unique_patterns]
 
     def get_docs(self, as_objects=False):
         """
@@ -80,38 +158,102 @@ class DocumentationGenerator():
 
         as_objects -- (bool) default=False. Set to true to return objects instead of JSON
         """
-        docs = self.__process_urlpatterns()
+        docs = self._profile('endpoints', self.__process_urlpatterns)
         docs.sort(key=lambda x: x.path)  # Sort by path
 
-        if as_objects:
-            return docs
-        else:
-            return jsonpickle.encode(docs, unpicklable=False)
+        if not as_objects:
+            docs = self._profile('encoding', lambda: encode([doc.as_dict() for doc in docs]))
 
-    def __process_urlpatterns(self):
-        """ Assembles ApiDocObject """
+        if self.profile is not None:
+            self.profile.report(self)
+        return docs
+
+    def update_docs(self, previous=None):
+        """
+        Gets (fingerprint, ApiDocObject) pairs for the URL patterns, in
+        pattern order. Objects of endpoints whose fingerprint is found
+        in previous are reused instead of being generated again
+
+        previous -- Dictionary of ApiDocObject by endpoint fingerprint
+        """
+        previous = previous or {}
+        mtimes = {}
+        fingerprints = []
         docs = []
+        missing = []
 
-        for endpoint in self.urlpatterns:
+        for position, endpoint in enumerate(self.urlpatterns):
 
             # Skip if URL isn't bound to a view
             if not endpoint.callback:
                 continue
 
-            # Build object and add it to the list
-            doc = self.ApiDocObject()
-            doc.title = self.__get_title__(endpoint)
-            parsed_docstring = self.__parse_docstring__(endpoint)
-            doc.description = parsed_docstring['description']
-            doc.params = parsed_docstring['params']
-            doc.path = self.__get_path__(endpoint)
-            doc.model = self.__get_model__(endpoint)
-            doc.allowed_methods = self.__get_allowed_methods__(endpoint)
-            doc.fields = self.__get_serializer_fields__(endpoint)
+            fingerprint = get_endpoint_fingerprint(endpoint, mtimes)
+            doc = previous.get(fingerprint)
+            if doc is None:
+                missing.append((len(docs), position))
+            fingerprints.append(fingerprint)
             docs.append(doc)
-            del(doc)  # Clean up
 
-        return docs
+        generated = self.get_endpoint_docs([position for i, position in missing])
+        for (i, position), doc in zip(missing, generated):
+            docs[i] = doc
+
+        return zip(fingerprints, docs)
+
+    def get_endpoint_docs(self, positions):
+        """
+        Assembles the ApiDocObject of the endpoints at the given positions
+        of the URL patterns, concurrently when workers is set. The objects
+        are returned in the order of positions
+        """
+        if not self.workers or self.workers < 2 or len(positions) < 2:
+            return [self.get_endpoint_doc(self.urlpatterns[position])
+                    for position in positions]
+
+        if self.executor == 'process':
+            # forked workers inherit the generator, only positions are sent
+            pool = multiprocessing.Pool(self.workers, _init_process_worker, (self,))
+            func = _get_endpoint_doc_in_process
+        else:
+            pool = ThreadPool(self.workers)
+            func = lambda position: self.get_endpoint_doc(self.urlpatterns[position])
+
+        try:
+            chunksize = max(1, len(positions) // (self.workers * 4))
+            return pool.map(func, positions, chunksize)
+        finally:
+            pool.close()
+            pool.join()
+
+    def get_endpoint_doc(self, endpoint):
+        """ Assembles the ApiDocObject of an endpoint """
+        run = self._profile
+        parsed_docstring = run('docstring', self.__parse_docstring__, endpoint=endpoint)
+        return self.ApiDocObject(
+            title=run('title', self.__get_title__, endpoint=endpoint),
+            description=parsed_docstring['description'],
+            params=parsed_docstring['params'],
+            path=run('path', self.__get_path__, endpoint=endpoint),
+            model=run('model', self.__get_model__, endpoint=endpoint),
+            allowed_methods=run('allowed_methods', self.__get_allowed_methods__, endpoint=endpoint),
+            fields=run('serializer_fields', self.__get_serializer_fields__, endpoint=endpoint),
+        )
+
+    def _profile(self, stage, func, *args, **kwargs):
+        """
+        Calls func, recording its duration in the profile if there is one
+        """
+        if self.profile is None:
+            return func(*args, **kwargs)
+        return self.profile.run(stage, func, *args, **kwargs)
+
+    def __process_urlpatterns(self):
+        """ Assembles ApiDocObject """
+        # Skip if URL isn't bound to a view
+        positions = [position for position, endpoint in enumerate(self.urlpatterns)
+                     if endpoint.callback]
+        return self.get_endpoint_docs(positions)
 
     def __get_title__(self, endpoint):
         """
@@ -146,12 +288,7 @@ class DocumentationGenerator():
         and replaces with RESTful URL descriptors
         """
         try:  # Get the URL
-            cleaned = endpoint.regex.pattern
-            cleaned = re.sub('\([^<]*<', '{', cleaned)
-            cleaned = re.sub('>[^\)]*\)', '}', cleaned)
-            cleaned = re.sub('^\^|/\??\$$', '', cleaned)
-            cleaned = re.sub('\$$', '', cleaned)
-            return cleaned
+            return path_normalizer.get_path(endpoint.regex.pattern)
         except:
             return None
 
@@ -169,7 +306,8 @@ class DocumentationGenerator():
         Gets allowed methods for the API. (ie. POST, PUT, GET)
         """
         try:  # Get the allowed methods
-            return endpoint.callback.cls().allowed_methods
+            return get_allowed_methods(endpoint.callback.cls,
+                                       instantiate=get_setting('INSTANTIATE_VIEWS'))
         except:
             pass
 
@@ -180,70 +318,295 @@ class DocumentationGenerator():
         """
         try:  # Get the model's serializer fields
             serializer = endpoint.callback.cls_instance.get_serializer_class()
-
-            fields = serializer().get_fields()
-
-            data = []
-
-            for name, field in fields.items():
-
-                field_data = {}
-                CAMELCASE_BOUNDARY = '(((?<=[a-z])[A-Z])|([A-Z](?![A-Z]|$)))'
-                field_name = re.sub(CAMELCASE_BOUNDARY, ' \\1', field.__class__.__name__)
-                field_data['type'] = field_name
-                try:
-                    field_data['read_only'] = field.read_only
-                except:
-                    pass
-                try:
-                    field_data['default'] = field.default
-                except:
-                    pass
-                try:
-                    field_data['max_length'] = field.max_length
-                except:
-                    pass
-                try:
-                    field_data['min_length'] = field.min_length
-                except:
-                    pass
-                data.append({name: field_data})
-
-            return data
+            return get_serializer_fields(serializer)
         except:
             return None
 
     def _trim(self, docstring):
         return trim_docstring(docstring)
 
-    class ApiDocObject(object):
-        """ API Documentation Object """
-        path = None
-        title = None
-        description = None
-        params = []
-        allowed_methods = []
-        model = None
+    ApiDocObject = ApiDocObject
+
+
+CAMELCASE_BOUNDARY = re.compile('(((?<=[a-z])[A-Z])|([A-Z](?![A-Z]|$)))')
+
+# Field metadata by serializer class and type labels by field class, so
+# serializers shared by several views are only introspected once. Views
+# without a serializer_class create a serializer class on every call, so
+# those are only kept for as long as they are in use
+_serializer_fields = weakref.WeakKeyDictionary()
+_field_type_labels = {}
+
+
+_process_generator = None
+
+
+def _init_process_worker(generator):
+    global _process_generator
+    _process_generator = generator
+
+
+def _get_endpoint_doc_in_process(position):
+    return _process_generator.get_endpoint_doc(_process_generator.urlpatterns[position])
+
+
+def join_regex(prefix, regex):
+    """
+    Appends the regex of a url pattern to the regex of the include
+    it is mounted under (ie. ^api/ and ^cigars/$ give ^api/cigars/$)
+    """
+    if prefix and regex.startswith('^'):
+        regex = regex[1:]
+    return prefix + regex
+
+
+def prefix_pattern(prefix, pattern):
+    """
+    Gets a url pattern matching the full path of pattern when it is
+    mounted under prefix, so that its documented path and parameters
+    include those of its includes
+    """
+    if not prefix:
+        return pattern
+    prefixed = RegexURLPattern(join_regex(prefix, pattern.regex.pattern), pattern.callback,
+                               pattern.default_args, pattern.name)
+    # kept so that swagger resources can be grouped below the includes
+    prefixed.include_prefix = prefix
+    return prefixed
+
+
+def get_endpoint_fingerprint(endpoint, mtimes=None):
+    """
+    Gets a fingerprint of what the documentation of an endpoint is made
+    of: its URL pattern, its view, serializer and model classes along with
+    the modification time of the modules defining them, and a hash of the
+    view's docstrings. The fingerprint changes when any of them does
+
+    mtimes -- Dictionary memoizing module modification times by module name
+    """
+    view = getattr(endpoint.callback, 'cls', None)
+    try:
+        serializer = endpoint.callback.cls_instance.get_serializer_class()
+    except:
+        serializer = None
+    model = getattr(view, 'model', None)
+
+    docstrings = hashlib.md5()
+    handlers = [getattr(view, method, None) for method in getattr(view, 'http_method_names', [])]
+    for docstring in [endpoint.callback.__doc__] + [getattr(h, '__doc__', None) for h in handlers]:
+        if isinstance(docstring, unicode):
+            docstring = docstring.encode('utf-8')
+        docstrings.update((docstring or '') + '\0')
+
+    if mtimes is None:
+        mtimes = {}
+    return (
+        endpoint.regex.pattern,
+        endpoint.name,
+        _get_class_fingerprint(view, mtimes),
+        _get_class_fingerprint(serializer, mtimes),
+        _get_class_fingerprint(model, mtimes),
+        docstrings.hexdigest(),
+    )
+
+
+def get_code_fingerprint(urlpatterns):
+    """
+    Gets a fingerprint of the code documented by the URL patterns. Unlike
+    endpoint fingerprints, it is the same on every host running the same
+    code: it hashes the source of the modules defining the views,
+    serializers and models rather than their modification times
+    """
+    mtimes = {}
+    sources = {}
+    fingerprint = hashlib.md5(__version__)
+    for endpoint in urlpatterns:
+        if not endpoint.callback:
+            continue
+        pattern, name, view, serializer, model, docstrings = \
+            get_endpoint_fingerprint(endpoint, mtimes)
+        fingerprint.update(repr((pattern, name, docstrings)))
+        for class_fingerprint in (view, serializer, model):
+            if class_fingerprint is not None:
+                class_name = class_fingerprint[0]
+                module_name = class_name.rsplit('.', 1)[0]
+                fingerprint.update(class_name + _get_module_hash(module_name, sources))
+    return fingerprint.hexdigest()
+
+
+def _get_module_hash(module_name, hashes):
+    try:
+        return hashes[module_name]
+    except KeyError:
+        module_hash = ''
+        filename = getattr(sys.modules.get(module_name), '__file__', None)
+        if filename:
+            if filename.endswith(('.pyc', '.pyo')):
+                filename = filename[:-1]
+            try:
+                with open(filename, 'rb') as f:
+                    module_hash = hashlib.md5(f.read()).hexdigest()
+            except IOError:
+                pass
+        hashes[module_name] = module_hash
+        return module_hash
+
+
+def _get_class_fingerprint(cls, mtimes):
+    if cls is None:
+        return None
+    module_name = cls.__module__
+    try:
+        mtime = mtimes[module_name]
+    except KeyError:
+        mtime = None
+        filename = getattr(sys.modules.get(module_name), '__file__', None)
+        if filename:
+            if filename.endswith(('.pyc', '.pyo')):
+                filename = filename[:-1]
+            try:
+                mtime = os.path.getmtime(filename)
+            except OSError:
+                pass
+        mtimes[module_name] = mtime
+    return '%s.%s' % (module_name, cls.__name__), mtime
+
+
+_allowed_methods = {}
+
+
+def get_allowed_methods(view_class, instantiate=False):
+    """
+    Gets the allowed methods of a view class (ie. GET, POST, OPTIONS)
+    from its handler methods and http_method_names, without running
+    the view's __init__
+
+    instantiate -- (bool) default=False. Set to true to read allowed_methods
+    from an instance when the view overrides the allowed_methods property
+    """
+    try:
+        return list(_allowed_methods[view_class])
+    except KeyError:
+        pass
+
+    allowed_methods = getattr(view_class, 'allowed_methods', None)
+    if isinstance(allowed_methods, (list, tuple)):
+        methods = list(allowed_methods)
+    elif (instantiate and isinstance(allowed_methods, property) and
+          allowed_methods is not APIView.allowed_methods):
+        methods = view_class().allowed_methods
+    else:
+        methods = [method.upper() for method in view_class.http_method_names
+                   if hasattr(view_class, method)]
+
+    _allowed_methods[view_class] = methods
+    return list(methods)
+
+
+def get_serializer_fields(serializer_class):
+    """
+    Gets the fields of a serializer class as a list of dictionaries
+    with field properties (type, read-only, default, min and max length)
+    """
+    try:
+        fields = _serializer_fields[serializer_class]
+    except KeyError:
+        fields = _serializer_fields[serializer_class] = _extract_serializer_fields(serializer_class)
+    # copied, so callers can't alter the memoized data
+    return [{name: dict(field_data)} for name, field_data in fields]
+
+
+def get_field_type_label(field_class):
+    """
+    Gets the label of a field class, ie. URLField gives ' URL Field'
+    """
+    try:
+        return _field_type_labels[field_class]
+    except KeyError:
+        label = _field_type_labels[field_class] = CAMELCASE_BOUNDARY.sub(' \\1', field_class.__name__)
+        return label
+
+
+def _extract_serializer_fields(serializer_class):
+    fields = serializer_class().get_fields()
+
+    data = []
+
+    for name, field in fields.items():
+
+        field_data = {}
+        field_data['type'] = get_field_type_label(field.__class__)
+        try:
+            field_data['read_only'] = field.read_only
+        except:
+            pass
+        try:
+            field_data['default'] = field.default
+        except:
+            pass
+        try:
+            field_data['max_length'] = field.max_length
+        except:
+            pass
+        try:
+            field_data['min_length'] = field.min_length
+        except:
+            pass
+        data.append((name, field_data))
+
+    return data
+
+
+METHOD_SECTION = re.compile('^(GET|POST|PUT|PATCH|DELETE|HEAD|OPTIONS|TRACE):\s?(.*)$')
+
+# Parsed docstrings by docstring, so each one is only parsed once
+_parsed_docstrings = {}
+
 
 def parse_docstring(docstring):
-    description = trim_docstring(docstring)
-    split_lines = description.split('\n')
-    trimmed = False  # Flag if string needs to be trimmed
+    """
+    Parses a docstring into a description, a list of parameters and
+    the descriptions of HTTP methods. Example of a parameter:
+
+        myVar -- a variable
+
+    and of a method description, found within the description:
+
+        GET: Gets a list of countries
+
+    The result is shared between callers and must not be modified
+    """
+    try:
+        return _parsed_docstrings[docstring]
+    except KeyError:
+        pass
+
+    description_lines = []
+    methods = {}
     _params = []
+    trimmed = False  # Flag set once the description has ended
 
-    for line in split_lines:
+    for line in trim_docstring(docstring).split('\n'):
         if not trimmed:
-            needle = line.find('--')
-            if needle != -1:
-                trim_at = description.find(line)
-                description = description[:trim_at]
+            if '--' in line:
                 trimmed = True
+            else:
+                description_lines.append(line)
+                section = METHOD_SECTION.match(line)
+                if section:
+                    methods[section.group(1)] = section.group(2)
 
         params = line.split(' -- ')
         if len(params) == 2:
             _params.append([params[0].strip(), params[1].strip()])
-    description = description.rstrip('\n')
-    return {'description': description, 'params': _params}
+
+    parsed = {
+        'description': '\n'.join(description_lines).rstrip('\n'),
+        'params': _params,
+        'methods': methods,
+    }
+    _parsed_docstrings[docstring] = parsed
+    return parsed
 
 def trim_docstring(docstring):
     """
@@ -0,0 +1,81 @@
+import hashlib
+import json
+from conf import get_setting
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _default(obj):
+    """ Encodes objects the JSON libraries don't know about """
+    if hasattr(obj, 'as_dict'):
+        return obj.as_dict()
+    return unicode(obj)
+
+
+def _encode_json(data):
+    return json.dumps(data, default=_default)
+
+
+def _encode_ujson(data):
+    try:
+        return ujson.dumps(data)
+    except (TypeError, OverflowError):
+        # ujson can't be given a default encoder
+        return _encode_json(data)
+
+
+def _encode_orjson(data):
+    return orjson.dumps(data, default=_default).decode('utf-8')
+
+
+BACKENDS = {
+    'json': _encode_json,
+    'ujson': _encode_ujson,
+    'orjson': _encode_orjson,
+}
+
+AVAILABLE_BACKENDS = dict(
+    (name, backend) for name, backend in BACKENDS.items()
+    if name == 'json' or globals()[name] is not None
+)
+
+
+def get_backend(name=None):
+    """
+    Gets the function encoding with the named JSON library. Defaults to
+    the JSON_BACKEND setting, or else to the fastest library installed
+    """
+    if name is None:
+        name = get_setting('JSON_BACKEND')
+    if name is None:
+        for name in ('orjson', 'ujson', 'json'):
+            if name in AVAILABLE_BACKENDS:
+                break
+    try:
+        return AVAILABLE_BACKENDS[name]
+    except KeyError:
+        raise ValueError("JSON backend '%s' is not available" % name)
+
+
+def encode(data, backend=None):
+    """
+    Encodes dictionaries, lists and objects having an as_dict
+    method to a JSON string
+    """
+    return get_backend(backend)(data)
+
+
+def content_hash(data):
+    """
+    Gets a hash of data which only depends on its content, to be used
+    as an entity tag. Dictionaries are encoded with sorted keys
+    """
+    return hashlib.md5(json.dumps(data, sort_keys=True, default=_default)).hexdigest()
@@ -0,0 +1,195 @@
+import re
+from bisect import bisect_left
+from encoding import content_hash
+
+
+class DocumentationIndex(object):
+    """
+    Answers filtered and paginated queries over the documentation of
+    the endpoints. The endpoints are sorted by path once, so prefix
+    filters are binary searches and pages are slices of that order
+    """
+
+    def __init__(self, docs):
+        """
+        docs -- List of endpoint dictionaries, as given by ApiDocObject.as_dict()
+        """
+        self.docs = sorted(docs, key=lambda doc: doc['path'] or '')
+        self.paths = [doc['path'] or '' for doc in self.docs]
+        self.positions_by_model = {}
+        self.positions_by_method = {}
+        self._search_index = None
+        self._etag = None
+
+        for position, doc in enumerate(self.docs):
+            if doc['model']:
+                self.positions_by_model.setdefault(doc['model'], []).append(position)
+            for method in doc['allowed_methods'] or []:
+                self.positions_by_method.setdefault(method.upper(), []).append(position)
+
+    @property
+    def etag(self):
+        """ Hash of the documentation, computed once """
+        if self._etag is None:
+            self._etag = content_hash(self.docs)
+        return self._etag
+
+    def search(self, query, limit=None):
+        """
+        Gets the endpoints matching a full-text query with their score,
+        best matches first. See SearchIndex
+        """
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.docs)
+        return self._search_index.search(query, limit=limit)
+
+    @classmethod
+    def from_objects(cls, docs):
+        return cls([doc.as_dict() for doc in docs])
+
+    def query(self, path=None, model=None, method=None, offset=0, limit=None, fields=None):
+        """
+        Gets a page of the endpoints matching the filters, as a dictionary
+        holding the number of matches and the page of results
+
+        path -- Prefix of the endpoint paths
+        model -- Name of the model of the endpoints
+        method -- HTTP method the endpoints must allow
+        fields -- List of the keys to keep in each result. Defaults to all
+        """
+        start, stop = self._get_path_range(path)
+
+        filters = []
+        if model is not None:
+            filters.append(self.positions_by_model.get(model, []))
+        if method is not None:
+            filters.append(self.positions_by_method.get(method.upper(), []))
+
+        if filters:
+            positions = None
+            for matches in filters:
+                # position lists are sorted, keep those within the path range
+                matches = matches[bisect_left(matches, start):bisect_left(matches, stop)]
+                positions = set(matches) if positions is None else positions.intersection(matches)
+            positions = sorted(positions)
+            count = len(positions)
+            page = positions[offset:offset + limit if limit is not None else None]
+            results = [self.docs[position] for position in page]
+        else:
+            count = stop - start
+            page_start = min(start + offset, stop)
+            page_stop = stop if limit is None else min(page_start + limit, stop)
+            results = self.docs[page_start:page_stop]
+
+        if fields:
+            results = [dict((field, doc[field]) for field in fields if field in doc)
+                       for doc in results]
+
+        return {
+            'count': count,
+            'offset': offset,
+            'limit': limit,
+            'results': results,
+        }
+
+    def _get_path_range(self, prefix):
+        """
+        Gets the [start, stop) range of the endpoints whose path starts
+        with the prefix
+        """
+        if not prefix:
+            return 0, len(self.paths)
+        start = bisect_left(self.paths, prefix)
+        successor = prefix[:-1] + unichr(ord(prefix[-1]) + 1)
+        return start, bisect_left(self.paths, successor, start)
+
+
+class SearchIndex(object):
+    """
+    Inverted index for full-text search over the documentation of the
+    endpoints. Words of titles and paths weigh the most, then parameter
+    and serializer field names, then descriptions. The last word of a
+    query also matches the words it is a prefix of
+    """
+
+    WORD = re.compile(r'[a-z0-9]+')
+
+    WEIGHTS = {
+        'title': 4,
+        'path': 4,
+        'name': 2,
+        'description': 1,
+    }
+
+    # A prefix match counts for less than the word itself
+    PREFIX_FACTOR = 0.5
+
+    def __init__(self, docs):
+        """
+        docs -- List of endpoint dictionaries, as given by ApiDocObject.as_dict()
+        """
+        self.docs = docs
+        self.postings = {}
+
+        for position, doc in enumerate(docs):
+            self._add(position, doc['title'], 'title')
+            self._add(position, doc['path'], 'path')
+            self._add(position, doc['description'], 'description')
+            for param in doc['params'] or []:
+                self._add(position, param[0], 'name')
+                self._add(position, param[1], 'description')
+            for field in doc['fields'] or []:
+                for name in field:
+                    self._add(position, name, 'name')
+
+        self.words = sorted(self.postings)
+
+    def search(self, query, limit=None):
+        """
+        Gets the endpoints matching every word of the query, as a list
+        of (score, endpoint dictionary) with the best matches first
+        """
+        words = self.tokenize(query)
+        if not words:
+            return []
+
+        scores = None
+        for i, word in enumerate(words):
+            matches = dict(self.postings.get(word, {}))
+            if i == len(words) - 1:
+                for other in self._get_words_starting_with(word):
+                    for position, score in self.postings[other].items():
+                        score *= self.PREFIX_FACTOR
+                        if score > matches.get(position, 0):
+                            matches[position] = score
+            if scores is None:
+                scores = matches
+            else:
+                scores = dict((position, score + matches[position])
+                              for position, score in scores.items() if position in matches)
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(score, self.docs[position]) for position, score in ranked]
+
+    def tokenize(self, text):
+        if not text:
+            return []
+        return self.WORD.findall(text.lower())
+
+    def _add(self, position, text, kind):
+        weight = self.WEIGHTS[kind]
+        for word in self.tokenize(text):
+            postings = self.postings.setdefault(word, {})
+            postings[position] = postings.get(position, 0) + weight
+
+    def _get_words_starting_with(self, prefix):
+        start = bisect_left(self.words, prefix)
+        for word in self.words[start:]:
+            if not word.startswith(prefix):
+                break
+            if word != prefix:
+                yield word
@@ -0,0 +1,76 @@
+from optparse import make_option
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from rest_framework_docs.build import DocumentationBuild
+from rest_framework_docs.cache import create_swagger_generator
+from rest_framework_docs.conf import get_setting
+from rest_framework_docs.docs import DocumentationGenerator
+from rest_framework_docs.encoding import encode
+from rest_framework_docs.profiling import GenerationProfile
+from rest_framework_docs.snapshot import DocumentationSnapshot, generate_documents
+
+
+class Command(BaseCommand):
+    help = ("Generates the API documentation ahead of time and writes the "
+            "HTML page and the swagger documents to disk")
+
+    option_list = BaseCommand.option_list + (
+        make_option('--output', dest='output', default=None,
+                    help='Directory to write to. Defaults to the BUILD_DIR setting'),
+        make_option('--snapshot', dest='snapshot', default=None,
+                    help='Write a single snapshot file instead of a directory (see SNAPSHOT_FILE)'),
+        make_option('--workers', dest='workers', type='int', default=None,
+                    help='Number of endpoints to introspect concurrently'),
+        make_option('--processes', action='store_const', dest='executor',
+                    const='process', default='thread',
+                    help='Introspect the endpoints in forked processes instead of threads'),
+        make_option('--profile', action='store_true', dest='profile', default=False,
+                    help='Print the time spent in each stage and the slowest endpoints'),
+        make_option('--no-swagger', action='store_false', dest='swagger', default=True,
+                    help='Do not write the swagger documents'),
+    )
+
+    def handle(self, *args, **options):
+        profile = GenerationProfile() if options.get('profile') else None
+        if options.get('snapshot'):
+            return self.write_snapshot(options['snapshot'], profile,
+                                       workers=options.get('workers'),
+                                       executor=options.get('executor'),
+                                       swagger=options.get('swagger'))
+
+        output = options.get('output') or get_setting('BUILD_DIR')
+        if not output:
+            raise CommandError("Specify --output or --snapshot, or set BUILD_DIR "
+                               "in REST_FRAMEWORK_DOCS")
+
+        build = DocumentationBuild(output)
+        generator = DocumentationGenerator(workers=options.get('workers'),
+                                           executor=options.get('executor'),
+                                           profile=profile)
+
+        docs = generator.get_docs(as_objects=True)
+        build.write_html(render_to_string("rest_framework_docs/docs.html", {'docs': docs}))
+        build.write_json(encode([doc.as_dict() for doc in docs]))
+        self.stdout.write("Wrote documentation for %d endpoints\n" % len(docs))
+        if profile is not None:
+            self.stdout.write(profile.format() + "\n\n")
+
+        if options.get('swagger'):
+            swagger = create_swagger_generator(
+                generator.urlpatterns,
+                profile=GenerationProfile() if options.get('profile') else None)
+            build.write_swagger(swagger.get_docs())
+            resources = swagger.base_api.children
+            for resource in resources:
+                build.write_swagger(swagger.get_docs(resource.path), resource.path)
+            self.stdout.write("Wrote swagger documentation for %d resources\n" % len(resources))
+            if swagger.profile is not None:
+                self.stdout.write(swagger.profile.format() + "\n")
+
+    def write_snapshot(self, filename, profile, workers=None, executor=None, swagger=True):
+        documents = generate_documents(workers=workers, executor=executor,
+                                       profile=profile, swagger=swagger)
+        DocumentationSnapshot(filename).write(documents)
+        self.stdout.write("Wrote a snapshot of %d documents to %s\n" % (len(documents), filename))
+        if profile is not None:
+            self.stdout.write(profile.format() + "\n")
@@ -0,0 +1,4 @@
+"""
+Rest Framework Docs has no models. The module lets Django find the
+application's tests
+"""
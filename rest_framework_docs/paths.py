@@ -0,0 +1,79 @@
+import re
+from collections import OrderedDict
+from rest_framework.settings import api_settings
+
+
+class PathNormalizer(object):
+    """
+    Turns the regular expressions of URL patterns into RESTful paths
+    (ie. ^cigars/(?P<pk>[^/]+)/?$ becomes cigars/{pk}) and extracts
+    their named parameters with a data type inferred from the regex.
+    Results are memoized by pattern string
+    """
+
+    SUBSTITUTIONS = (
+        (re.compile(r'\([^<]*<'), '{'),
+        (re.compile(r'>[^\)]*\)'), '}'),
+        (re.compile(r'^\^|/\??\$$'), ''),
+        (re.compile(r'\$$'), ''),
+    )
+
+    NAMED_GROUP = re.compile(r'\(\?P<(\w+)>([^)]*)\)')
+
+    # Format suffix ending the patterns added by Django REST Framework's
+    # format_suffix_patterns, ie. \.(?P<format>[a-z0-9]+)$
+    FORMAT_SUFFIX = re.compile(r'\\?\.\(\?P<%s>(?:[^()]|\([^()]*\))*\)(?:/\??)?\$?$' %
+                               re.escape(getattr(api_settings, 'FORMAT_SUFFIX_KWARG', 'format')))
+
+    # Regexes of parameters documented as integers. Everything else is a string
+    INTEGER_PATTERN = re.compile(r'^(\\d|\[0-9\])(\+|\*|\{\d*,?\d*\})?$')
+
+    def __init__(self):
+        self._paths = {}
+        self._parameters = {}
+
+    def get_path(self, pattern):
+        """
+        Gets the path of a URL pattern regex string
+        """
+        try:
+            return self._paths[pattern]
+        except KeyError:
+            cleaned = pattern
+            for regex, replacement in self.SUBSTITUTIONS:
+                cleaned = regex.sub(replacement, cleaned)
+            self._paths[pattern] = cleaned
+            return cleaned
+
+    def get_parameters(self, regex):
+        """
+        Gets an ordered dictionary mapping the names of the parameters
+        of a compiled URL pattern regex to their data type (int or string)
+        """
+        try:
+            parameters = self._parameters[regex.pattern]
+        except KeyError:
+            types = dict(self.NAMED_GROUP.findall(regex.pattern))
+            parameters = OrderedDict()
+            for name, index in sorted(regex.groupindex.items(), key=lambda item: item[1]):
+                parameters[name] = self.get_data_type(types.get(name, ''))
+            self._parameters[regex.pattern] = parameters
+        # copied, callers are free to remove parameters
+        return OrderedDict(parameters)
+
+    def get_route(self, pattern):
+        """
+        Gets the path of a URL pattern regex string without its format
+        suffix and trailing slash, which is the same for a pattern and
+        its format suffix variants, along with whether it had a suffix
+        """
+        stripped = self.FORMAT_SUFFIX.sub('', pattern)
+        return self.get_path(stripped).rstrip('/?'), stripped != pattern
+
+    def get_data_type(self, group_pattern):
+        if self.INTEGER_PATTERN.match(group_pattern):
+            return "int"
+        return "string"
+
+
+path_normalizer = PathNormalizer()
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+from signals import docs_profiled
+
+logger = logging.getLogger('rest_framework_docs.profiling')
+
+
+class GenerationProfile(object):
+    """
+    Records the time spent in each stage of a documentation generation
+    (ie. serializer field extraction or docstring parsing), in total and
+    per endpoint. Give it to a generator with its profile argument
+    """
+
+    def __init__(self):
+        self.stages = {}  # [count, seconds] by stage
+        self.endpoints = {}  # {stage: seconds} by endpoint
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, endpoint=None):
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            if endpoint is not None:
+                key = (endpoint.regex.pattern, endpoint.name)
+                stages = self.endpoints.setdefault(key, {})
+                stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def run(self, stage, func, *args, **kwargs):
+        """
+        Calls func, recording its duration under stage. An endpoint
+        keyword argument, if any, is passed on to func
+        """
+        start = time.time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.record(stage, time.time() - start, kwargs.get('endpoint'))
+
+    def get_slowest_endpoints(self, count=10):
+        """
+        Gets the endpoints which took the longest, as a list of
+        dictionaries with their pattern, name, total and stage times
+        """
+        with self._lock:
+            endpoints = [
+                {'pattern': pattern, 'name': name,
+                 'seconds': sum(stages.values()), 'stages': dict(stages)}
+                for (pattern, name), stages in self.endpoints.items()
+            ]
+        endpoints.sort(key=lambda endpoint: -endpoint['seconds'])
+        return endpoints[:count]
+
+    def as_dict(self, slowest=10):
+        with self._lock:
+            stages = dict(
+                (stage, {'count': count, 'seconds': seconds})
+                for stage, (count, seconds) in self.stages.items()
+            )
+        return {
+            'stages': stages,
+            'slowest_endpoints': self.get_slowest_endpoints(slowest),
+        }
+
+    def format(self, slowest=10):
+        """ Gets the report as text """
+        report = self.as_dict(slowest)
+        lines = ["%-24s %8s %12s" % ("Stage", "Count", "Time (ms)")]
+        for stage, totals in sorted(report['stages'].items(),
+                                    key=lambda item: -item[1]['seconds']):
+            lines.append("%-24s %8d %12.1f" % (stage, totals['count'], totals['seconds'] * 1000))
+        if report['slowest_endpoints']:
+            lines.append("")
+            lines.append("Slowest endpoints (ms):")
+            for endpoint in report['slowest_endpoints']:
+                lines.append("%10.1f  %s (%s)" % (endpoint['seconds'] * 1000,
+                                                  endpoint['pattern'], endpoint['name']))
+        return '\n'.join(lines)
+
+    def report(self, sender):
+        """
+        Logs the report to the rest_framework_docs.profiling logger and
+        sends the docs_profiled signal
+        """
+        logger.info("Documentation generated by %s\n%s", sender.__class__.__name__, self.format())
+        docs_profiled.send(sender=sender.__class__, generator=sender, profile=self)
@@ -0,0 +1,38 @@
+from django.template import Context
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+ENDPOINTS_PLACEHOLDER = '<!-- rest_framework_docs:endpoints -->'
+
+
+def render_documentation_stream(docs, context_instance=None):
+    """
+    Renders the documentation page piece by piece: the page up to the
+    list of endpoints, then one block per endpoint (endpoint.html), then
+    the end of the page. The list of endpoints is located in docs.html
+    by rendering it without endpoints and an endpoints_placeholder
+    """
+    page = render_to_string("rest_framework_docs/docs.html", {
+        'docs': [],
+        'endpoints_placeholder': mark_safe(ENDPOINTS_PLACEHOLDER),
+    }, context_instance=context_instance)
+
+    if ENDPOINTS_PLACEHOLDER not in page:
+        # docs.html was overridden without the placeholder
+        yield render_to_string("rest_framework_docs/docs.html", {'docs': docs},
+                               context_instance=context_instance)
+        return
+
+    head, tail = page.split(ENDPOINTS_PLACEHOLDER, 1)
+    yield head
+
+    template = get_template("rest_framework_docs/endpoint.html")
+    context = context_instance or Context()
+    for api in docs:
+        context.update({'api': api})
+        try:
+            yield template.render(context)
+        finally:
+            context.pop()
+
+    yield tail
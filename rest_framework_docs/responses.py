@@ -0,0 +1,90 @@
+import hashlib
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from compression import choose_encoding
+from conf import get_setting
+
+
+def conditional_response(request, content, content_type, etag=None, last_modified=None):
+    """
+    Builds a response carrying ETag and Last-Modified headers, or an empty
+    304 response when the client already holds the same content
+
+    etag -- Unquoted entity tag of the content
+    last_modified -- Modification time of the content, as a UNIX timestamp
+    """
+    response = not_modified_response(request, etag, last_modified)
+    if response is None:
+        response = HttpResponse(content, content_type=content_type)
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def document_response(request, document):
+    """
+    Serves a PrecompressedDocument, compressed with the best content
+    coding the client accepts
+    """
+    encoding = choose_encoding(request)
+    if encoding is None:
+        response = conditional_response(request, document.content, document.content_type,
+                                        etag=document.etag)
+    else:
+        # each coding is a distinct representation, with its own tag
+        response = conditional_response(request, document.get_variant(encoding),
+                                        document.content_type,
+                                        etag='%s-%s' % (document.etag, encoding))
+        if response.status_code == 200:
+            response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def not_modified_response(request, etag=None, last_modified=None):
+    """
+    Gets an empty 304 response if the request's If-None-Match or
+    If-Modified-Since headers match the content, or else None
+    """
+    if etag is not None:
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            if etag in etags or '*' in etags:
+                return _not_modified(etag, last_modified)
+    if last_modified is not None and 'HTTP_IF_NONE_MATCH' not in request.META:
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        if if_modified_since and int(last_modified) <= if_modified_since:
+            return _not_modified(etag, last_modified)
+    return None
+
+
+def set_validators(response, etag=None, last_modified=None):
+    """
+    Sets the ETag, Last-Modified and Cache-Control (from the
+    CACHE_CONTROL setting) headers of a response
+    """
+    if etag is not None:
+        response['ETag'] = quote_etag(etag)
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    cache_control = get_setting('CACHE_CONTROL')
+    if cache_control:
+        response['Cache-Control'] = cache_control
+
+
+def derive_etag(etag, *parts):
+    """
+    Gets the entity tag of a representation of content tagged
+    etag, ie. a page of it or its HTML rendering
+    """
+    key = ':'.join([etag] + [part.encode('utf-8') if isinstance(part, unicode) else part
+                             for part in parts])
+    return hashlib.md5(key).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    response = HttpResponseNotModified()
+    set_validators(response, etag, last_modified)
+    return response
@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Sent when a generator given a GenerationProfile is done generating
+docs_profiled = Signal(providing_args=['generator', 'profile'])
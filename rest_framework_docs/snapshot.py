@@ -0,0 +1,237 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from django.http import Http404, HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import patch_vary_headers
+try:
+    from django.http import StreamingHttpResponse
+except ImportError:  # Django < 1.5 streams iterators given to HttpResponse
+    StreamingHttpResponse = HttpResponse
+from cache import create_swagger_generator
+from compression import ENCODINGS, choose_encoding, compress
+from conf import get_setting
+from docs import DocumentationGenerator
+from encoding import encode
+from index import DocumentationIndex
+from responses import not_modified_response, set_validators
+
+try:
+    import fcntl
+except ImportError:  # no file locks, ie. on Windows
+    fcntl = None
+
+
+class DocumentationSnapshot(object):
+    """
+    A single file holding the rendered HTML page, the JSON documentation
+    and the swagger documents, each with its compressed variants. Every
+    process memory-maps the file read-only and serves slices of it, so
+    the pages are shared by all the workers of a host instead of being
+    generated and held by each of them.
+
+    The file starts with a header naming each document with its entity
+    tag, content type and the offset and length of its variants
+    """
+
+    MAGIC = 'RFDSNAP1'
+    HEADER = struct.Struct('>8sQ')  # magic, length of the table of contents
+    CHUNK_SIZE = 64 * 1024
+
+    HTML = 'index.html'
+    JSON = 'docs.json'
+    SWAGGER = 'swagger.json'
+
+    # (validators, mmap, table of contents) of the files mapped so far, by filename
+    _maps = {}
+    # (mmap, DocumentationIndex) of the files loaded so far, by filename
+    _indexes = {}
+    _lock = threading.Lock()
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    @classmethod
+    def swagger_name(cls, path=None):
+        return 'swagger/%s' % path if path else cls.SWAGGER
+
+    def exists(self):
+        return os.path.exists(self.filename)
+
+    def write(self, documents):
+        """
+        Writes the snapshot through a temporary file, so that processes
+        keep serving the previous one until it is replaced
+
+        documents -- List of (name, content, content_type)
+        """
+        table = {}
+        blobs = []
+        offset = 0
+        for name, content, content_type in documents:
+            if isinstance(content, unicode):
+                content = content.encode('utf-8')
+            variants = {}
+            for encoding, blob in [('identity', content)] + [
+                    (encoding, compress(content, encoding)) for encoding in ENCODINGS]:
+                variants[encoding] = (offset, len(blob))
+                blobs.append(blob)
+                offset += len(blob)
+            table[name] = {
+                'content_type': content_type,
+                'etag': hashlib.md5(content).hexdigest(),
+                'variants': variants,
+            }
+
+        table = json.dumps(table)
+        self._make_directory()
+        # unique to the thread, so concurrent writers never share one
+        temp_filename = '%s.%d.%d.tmp' % (self.filename, os.getpid(),
+                                          threading.current_thread().ident)
+        with open(temp_filename, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, len(table)))
+            f.write(table)
+            for blob in blobs:
+                f.write(blob)
+        os.rename(temp_filename, self.filename)
+
+    def serve(self, request, name):
+        """
+        Serves a document of the snapshot, compressed with the best
+        content coding the client accepts
+        """
+        data, table, last_modified = self._map()
+        try:
+            document = table[name]
+        except KeyError:
+            raise Http404
+
+        variants = document['variants']
+        encoding = choose_encoding(request, [encoding for encoding in ENCODINGS
+                                             if encoding in variants])
+        etag = document['etag']
+        if encoding is not None:
+            etag = '%s-%s' % (etag, encoding)
+
+        response = not_modified_response(request, etag, last_modified)
+        if response is None:
+            offset, length = variants[encoding or 'identity']
+            response = StreamingHttpResponse(self._iter_slice(data, offset, length),
+                                             content_type=document['content_type'])
+            response['Content-Length'] = str(length)
+            if encoding is not None:
+                response['Content-Encoding'] = encoding
+            set_validators(response, etag, last_modified)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def get_index(self):
+        """
+        Gets a DocumentationIndex over the JSON documentation of the
+        snapshot, loaded again whenever the snapshot is replaced
+        """
+        data, table, last_modified = self._map()
+        with self._lock:
+            cached = self._indexes.get(self.filename)
+            if cached and cached[0] is data:
+                return cached[1]
+        try:
+            offset, length = table[self.JSON]['variants']['identity']
+        except KeyError:
+            raise Http404
+        index = DocumentationIndex(json.loads(data[offset:offset + length]))
+        with self._lock:
+            self._indexes[self.filename] = (data, index)
+        return index
+
+    def _map(self):
+        """
+        Gets the memory map, table of contents and modification time of
+        the file, mapping it again when it was replaced. Maps which were
+        replaced are closed once the responses reading them are done
+        """
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            raise Http404
+        validators = (stat.st_ino, stat.st_mtime, stat.st_size)
+
+        with self._lock:
+            cached = self._maps.get(self.filename)
+            if cached and cached[0] == validators:
+                return cached[1], cached[2], stat.st_mtime
+
+            with open(self.filename, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, length = self.HEADER.unpack(data[:self.HEADER.size])
+            if magic != self.MAGIC:
+                raise ValueError("%s is not a documentation snapshot" % self.filename)
+            start = self.HEADER.size + length
+            table = json.loads(data[self.HEADER.size:start])
+            for document in table.values():
+                document['variants'] = dict(
+                    (encoding, (start + offset, size))
+                    for encoding, (offset, size) in document['variants'].items()
+                )
+            self._maps[self.filename] = (validators, data, table)
+            return data, table, stat.st_mtime
+
+    def _make_directory(self):
+        directory = os.path.dirname(self.filename)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _iter_slice(self, data, offset, length):
+        stop = offset + length
+        while offset < stop:
+            yield data[offset:min(offset + self.CHUNK_SIZE, stop)]
+            offset += self.CHUNK_SIZE
+
+
+def generate_documents(workers=None, executor=None, profile=None, swagger=True):
+    """
+    Generates the documents of a snapshot: the HTML page, rendered
+    without a request context, the JSON documentation and, unless
+    swagger is False, the swagger resource listing and resources
+    """
+    generator = DocumentationGenerator(workers=workers, executor=executor, profile=profile)
+    docs = generator.get_docs(as_objects=True)
+    documents = [
+        (DocumentationSnapshot.HTML,
+         render_to_string("rest_framework_docs/docs.html", {'docs': docs}),
+         'text/html; charset=utf-8'),
+        (DocumentationSnapshot.JSON, encode([doc.as_dict() for doc in docs]), 'application/json'),
+    ]
+    if swagger:
+        generator = create_swagger_generator(generator.urlpatterns, profile=profile)
+        documents.append((DocumentationSnapshot.SWAGGER, generator.get_docs(), 'application/json'))
+        for resource in generator.base_api.children:
+            documents.append((DocumentationSnapshot.swagger_name(resource.path),
+                              generator.get_docs(resource.path), 'application/json'))
+    return documents
+
+
+def get_snapshot():
+    """
+    Gets the snapshot named by the SNAPSHOT_FILE setting. The first
+    process to need it while the file does not exist builds it, the
+    other processes of the host wait for that build and then map it
+    """
+    snapshot = DocumentationSnapshot(get_setting('SNAPSHOT_FILE'))
+    if snapshot.exists():
+        return snapshot
+
+    snapshot._make_directory()
+    with open(snapshot.filename + '.lock', 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            if not snapshot.exists():
+                snapshot.write(generate_documents(workers=get_setting('WORKERS')))
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+    return snapshot
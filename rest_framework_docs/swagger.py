@@ -1,10 +1,21 @@
 from rest_framework_docs.docs import DocumentationGenerator
-from rest_framework_docs.docs import parse_docstring
-import jsonpickle
-from django.http import Http404
+from rest_framework_docs.docs import parse_docstring, get_endpoint_fingerprint
+from rest_framework_docs.paths import path_normalizer
+from rest_framework_docs.encoding import encode, content_hash
+from rest_framework_docs.compression import PrecompressedDocument
+import hashlib
+import logging
 import re
+import threading
+from collections import OrderedDict
+from django.http import Http404
+
+logger = logging.getLogger('rest_framework_docs.swagger')
 
 class Api(object):
+    __slots__ = ('path', 'children', '_children_by_path', 'description', 'view',
+                 'methods', 'docstring', 'operations', 'url_parameters', 'models')
+
     def __init__(self,
                  path="",
                  description="",
@@ -15,6 +26,8 @@ class Api(object):
 
         self.path = path
         self.children = []
+        # first child of each path, so lookups don't scan the children
+        self._children_by_path = {}
         self.description = description
         self.view = view
         self.methods = methods or []
@@ -27,32 +40,37 @@ class Api(object):
         self.__create_operations()
 
     def get_child(self, path):
-        try:
-            return [child for child in self.children if child.path == path][0]
-        except IndexError:
-            return None
+        return self._children_by_path.get(path)
 
     def add_child(self, child):
         self.children.append(child)
+        self._children_by_path.setdefault(child.path, child)
 
     def as_dict(self, docs_path):
-        if self.docstring:
-            description = self.docstring["description"]
-        else:
-            description = self.description
-
         operations = [operation.as_dict() for operation in self.operations]
         return {
             "path": docs_path + self.path,
-            "description": description,
+            "description": self.description,
             "operations": operations
         }
 
     def __create_operations(self):
         self.operations = []
+        documented_methods = []
         for method in self.methods:
             if method != "OPTIONS":
                 self.operations.append(self.__create_operation(method))
+                if not self.__get_method_docstring(method):
+                    documented_methods.append(method)
+
+        # the view's description, without the lines describing the
+        # methods which were used as operation summaries
+        if self.docstring:
+            prefixes = tuple(method + ":" for method in documented_methods)
+            lines = self.docstring["description"].split('\n')
+            self.description = '\n'.join(
+                line for line in lines if not line.startswith(prefixes)
+            ).rstrip('\n')
 
     def __create_operation(self, method):
 
@@ -103,13 +121,13 @@ class Api(object):
             operation.response_class = model_type
 
 
-        #add params from url TODO: infer type
+        #add params from url, typed from their regex
         if self.url_parameters:
-            for key in self.url_parameters.keys():
+            for key, data_type in self.url_parameters.items():
                 operation.add_parameter(
                     SwaggerParameter(
                         param_type="path",
-                        data_type="int",
+                        data_type=data_type,
                         allow_multiple=False,
                         name=key
                     )
@@ -161,24 +179,20 @@ class Api(object):
         except AttributeError:
             return None
 
+    def __get_method_docstring(self, method):
+        return getattr(self.view, method.lower()).__doc__
+
     def __parse_doc_for_method(self, method):
-        docstring = getattr(self.view, method.lower()).__doc__
+        docstring = self.__get_method_docstring(method)
         if docstring:
             return parse_docstring(docstring)
 
-        split_lines = self.docstring["description"].split('\n')
-
-        doc = ""
-        description = ""
-        for line in split_lines:
-            if line.startswith(method + ":"):
-                doc = line.replace(method + ": ", "")
-            else:
-                description += line + "\n"
-        self.docstring["description"] = description.rstrip('\n')
-        return {"description": doc, "params": None}
+        methods = self.docstring["methods"] if self.docstring else {}
+        return {"description": methods.get(method, ""), "params": None}
 
 class SwaggerParameter(object):
+    __slots__ = ('data_type', 'allow_multiple', 'required', 'param_type',
+                 'name', 'description')
 
     def __init__(self,
                  data_type=None,
@@ -206,6 +220,8 @@ class SwaggerParameter(object):
         }
 
 class SwaggerOperationObject(object):
+    __slots__ = ('method', 'nickname', 'response_class', 'summary',
+                 'parameters', 'is_list')
 
     def __init__(self,
                  method="GET",
@@ -232,13 +248,113 @@ class SwaggerOperationObject(object):
             "parameters": [param.as_dict() for param in self.parameters]
         }
 
+class SwaggerModelRegistry(object):
+    """
+    Swagger model definitions of all the views, by name. Identical
+    definitions are stored once, and a name defined differently by
+    several views is reported as a conflict
+    """
+
+    # container types around the name of a model, ie. List[Cigar]
+    CONTAINER = re.compile(r'^\w+\[(.+)\]$')
+
+    def __init__(self):
+        self._definitions = {}  # definition by content hash
+        self._hashes = {}  # hashes of the definitions of each name
+
+    def register(self, models):
+        """
+        Adds the models of a view (see get_swagger_models) and returns
+        them with their definitions shared with the other views
+        """
+        if not models:
+            return models
+        registered = {}
+        for name, definition in models.iteritems():
+            key = content_hash(definition)
+            definition = self._definitions.setdefault(key, definition)
+            hashes = self._hashes.setdefault(name, [])
+            if key not in hashes:
+                if hashes:
+                    logger.warning("Conflicting definitions of the swagger model %s", name)
+                hashes.append(key)
+            registered[name] = definition
+        return registered
+
+    def get(self, name):
+        """ Gets the first definition registered for a model name """
+        hashes = self._hashes.get(name)
+        return self._definitions[hashes[0]] if hashes else None
+
+    @property
+    def conflicts(self):
+        """ Gets the definitions of the names defined differently by several views """
+        return dict(
+            (name, [self._definitions[key] for key in hashes])
+            for name, hashes in self._hashes.iteritems() if len(hashes) > 1
+        )
+
+    def get_models(self, apis):
+        """
+        Gets the models the views of apis declare, those their operations
+        reference and the models those reference in turn. The definitions
+        of the apis' own views take precedence over those of other views
+        """
+        declared = {}
+        for api in apis:
+            if api.models:
+                declared.update(api.models)
+
+        models = dict(declared)
+        names = []
+        for definition in declared.itervalues():
+            names.extend(self.__get_references(definition))
+        for api in apis:
+            for operation in api.operations:
+                names.append(operation.response_class)
+                names.extend(parameter.data_type for parameter in operation.parameters)
+
+        while names:
+            name = names.pop()
+            if not isinstance(name, basestring):
+                continue
+            container = self.CONTAINER.match(name)
+            if container:
+                names.append(container.group(1))
+                continue
+            if name in models:
+                continue
+            definition = declared.get(name) or self.get(name)
+            if definition is not None:
+                models[name] = definition
+                names.extend(self.__get_references(definition))
+        return models
+
+    def __get_references(self, definition):
+        """ Gets the types referenced anywhere in a model definition """
+        references = []
+        values = [definition]
+        while values:
+            value = values.pop()
+            if isinstance(value, dict):
+                for key, item in value.iteritems():
+                    if key in ("type", "$ref") and isinstance(item, basestring):
+                        references.append(item)
+                    else:
+                        values.append(item)
+            elif isinstance(value, (list, tuple)):
+                values.extend(value)
+        return references
+
+
 class SwaggerResponseWrapper(object):
 
-    def __init__(self, base_path="", api_version="", apis=None, docs_path="/"):
+    def __init__(self, base_path="", api_version="", apis=None, docs_path="/", models=None):
         self.base_path = base_path
         self.api_version = api_version
         self.apis = apis
         self.docs_path = docs_path
+        self.models = models
 
     def as_dict(self):
 
@@ -252,13 +368,8 @@ class SwaggerResponseWrapper(object):
             response_dict["apis"] = [
                 api.as_dict(docs_path=self.docs_path) for api in self.apis
             ]
-        models = {}
-        for api in self.apis:
-            if api.models:
-                for key, value in api.models.iteritems():
-                    models[key] = value
-        if models:
-            response_dict["models"] = models
+        if self.models:
+            response_dict["models"] = self.models
         return response_dict
 
 class SwaggerDocumentationGenerator(DocumentationGenerator):
@@ -267,34 +378,188 @@ class SwaggerDocumentationGenerator(DocumentationGenerator):
                  urlpatterns=None,
                  base_path="",
                  server_url="",
-                 docs_path=""
+                 docs_path="",
+                 lazy=False,
+                 profile=None
                  ):
+        """
+        lazy -- (bool) default=False. Set to true to only build the resource
+        listing up front. Each resource is then generated the first time its
+        path is requested
+        profile -- GenerationProfile to record timings in
+        """
+        self.profile = profile
+        self._collect_url_patterns = urlpatterns is None
+        if urlpatterns is None:
+            urlpatterns = self._profile('url_patterns', self.get_url_patterns)
+
         self.urlpatterns = urlpatterns
         self.base_path = base_path
         self.server_url = server_url
         self.docs_path = docs_path
-
-        self.base_api = self.generate_apis()
+        self.lazy = lazy
+
+        self.base_api = Api(path="/")
+        # endpoints of the resources which are not generated yet, by path
+        self._pending_resources = {}
+        self._pending_lock = threading.Lock()
+        # fingerprints of the endpoints of each generated resource, by path
+        self._resource_fingerprints = {}
+        # encoded documentation of each resource, by path
+        self._documents = {}
+        self._profile_reported = False
+        # model definitions of the views, registered again on each refresh
+        self.model_registry = SwaggerModelRegistry()
+
+        self.refresh(urlpatterns)
 
     def get_docs(self, path=None):
+        return self.get_document(path).content
+
+    def get_document(self, path=None):
+        """
+        Gets the JSON documentation of a resource, or the resource listing
+        when no path is given, as a PrecompressedDocument. It is only
+        encoded, hashed and compressed once per resource
+        """
+        documents = self._documents
+        try:
+            return documents[path or ""]
+        except KeyError:
+            pass
+
+        if path:
+            # generated apart, so the encoding stage only times the encoding
+            self.get_resource(path)
+        content = self._profile('swagger_encoding', self._encode_docs, path)
+        if isinstance(content, unicode):
+            content = content.encode('utf-8')
+        document = documents[path or ""] = PrecompressedDocument(
+            content, 'application/json', hashlib.md5(content).hexdigest())
+        if path:
+            self._report_profile()
+        return document
+
+    def _encode_docs(self, path):
         if path:
-            child = self.base_api.get_child(path)
+            child = self.get_resource(path)
             if not child:
                 raise Http404
             children = child.children
             docs_path = "/" + path + "/"
+            models = child.models
         else:
             docs_path = self.docs_path
             children = self.base_api.children
+            models = None
 
         response = SwaggerResponseWrapper(
             base_path = self.server_url + "/" + self.base_path,
             api_version = "2.0",
             apis = children,
-            docs_path = docs_path
+            docs_path = docs_path,
+            models = models
         )
 
-        return jsonpickle.encode(response.as_dict(), unpicklable=False)
+        return encode(response.as_dict())
+
+    def get_resource(self, path):
+        """
+        Gets the top level Api of a resource, generating its
+        children first if that has not been done yet
+        """
+        child = self.base_api.get_child(path)
+        if child is not None and path in self._pending_resources:
+            with self._pending_lock:
+                child = self.base_api.get_child(path)
+                endpoints = self._pending_resources.get(path)
+                if endpoints is not None:
+                    self._resource_fingerprints[path] = self._get_resource_fingerprint(endpoints)
+                    self._generate_resource(self.base_api, path, endpoints)
+                    del self._pending_resources[path]
+        return child
+
+    def _report_profile(self):
+        """
+        Reports the profile once per build, when no resource is left
+        to generate
+        """
+        if self.profile is None:
+            return
+        with self._pending_lock:
+            if self._pending_resources or self._profile_reported:
+                return
+            self._profile_reported = True
+        self.profile.report(self)
+
+    def refresh(self, urlpatterns=None):
+        """
+        Regenerates the resources whose endpoints changed since they were
+        generated (see get_endpoint_fingerprint), and reuses the others
+
+        urlpatterns -- List of UrlPatterns. Defaults to the current list, or
+        to the project's URL patterns when none were given to the constructor
+        """
+        if urlpatterns is not None:
+            self.urlpatterns = urlpatterns
+        elif self._collect_url_patterns:
+            self.urlpatterns = self._profile('url_patterns', self.get_url_patterns)
+
+        mtimes = {}
+        with self._pending_lock:
+            base_api = Api(path="/")
+            pending_resources = {}
+            resource_fingerprints = {}
+            documents = {}
+            resource_endpoints = self._get_resource_endpoints()
+
+            # the models of all the views, registered before any resource
+            # resolves its models so that the result does not depend on
+            # which resources were generated first
+            self.model_registry = SwaggerModelRegistry()
+            for endpoints in resource_endpoints.values():
+                for endpoint, sub, exclude_param in endpoints:
+                    view = endpoint.callback.cls
+                    if hasattr(view, "get_swagger_models"):
+                        self.model_registry.register(view.get_swagger_models())
+
+            for path, endpoints in resource_endpoints.items():
+                previous = self.base_api.get_child(path)
+                fingerprint = self._resource_fingerprints.get(path)
+                if (previous is not None and path not in self._pending_resources and
+                        fingerprint is not None and
+                        self._get_resource_fingerprint(endpoints, mtimes) == fingerprint):
+                    resource_fingerprints[path] = fingerprint
+                    base_api.add_child(previous)
+                    # the models its views reference may be defined by others
+                    models = self.model_registry.get_models(previous.children)
+                    if models == previous.models and path in self._documents:
+                        documents[path] = self._documents[path]
+                    previous.models = models
+                elif self.lazy:
+                    base_api.add_child(Api(path=path))
+                    pending_resources[path] = endpoints
+                else:
+                    resource_fingerprints[path] = self._get_resource_fingerprint(endpoints, mtimes)
+                    self._generate_resource(base_api, path, endpoints)
+
+            self.base_api = base_api
+            self._pending_resources = pending_resources
+            self._resource_fingerprints = resource_fingerprints
+            self._documents = documents
+            self._profile_reported = False
+
+        self._report_profile()
+
+    def _get_resource_fingerprint(self, endpoints, mtimes=None):
+        """
+        Gets the fingerprints of the endpoints of a resource. Computed when
+        the resource is generated, and compared by the following refresh
+        """
+        return tuple(
+            (get_endpoint_fingerprint(endpoint, mtimes), sub, exclude_param)
+            for endpoint, sub, exclude_param in endpoints
+        )
 
     def generate_api(self, base_api, path, endpoint, sub, exclude_param=None):
 
@@ -303,8 +568,7 @@ class SwaggerDocumentationGenerator(DocumentationGenerator):
             child = Api(path=path)
             base_api.add_child(child)
 
-        regex = re.compile(endpoint.regex.pattern)
-        url_params = regex.groupindex
+        url_params = path_normalizer.get_parameters(endpoint.regex)
         if exclude_param and exclude_param in url_params:
             del url_params[exclude_param]
 
@@ -315,35 +579,76 @@ class SwaggerDocumentationGenerator(DocumentationGenerator):
             view=endpoint.callback.cls,
             url_parameters = url_params
         )
+        api.models = self.model_registry.register(api.models)
 
         child.add_child(api)
 
     def generate_apis(self):
 
         base_api = Api(path="/")
+        for path, endpoints in self._get_resource_endpoints().items():
+            self._generate_resource(base_api, path, endpoints)
+        return base_api
+
+    def _generate_resource(self, base_api, path, endpoints):
+        for endpoint, sub, exclude_param in endpoints:
+            self._profile('swagger_api', self.generate_api, base_api, path,
+                          endpoint=endpoint, sub=sub, exclude_param=exclude_param)
+        resource = base_api.get_child(path)
+        if resource is not None:
+            resource.models = self.model_registry.get_models(resource.children)
+
+    def _split_path(self, endpoint):
+        """
+        Gets the resource path and the sub path of an endpoint. The
+        resource is the first segment of the path below the includes the
+        endpoint is mounted under (ie. api/v2/cigars for api/v2/cigars/{pk}
+        included under api/v2/), relative to the base path
+        """
+        path = self.__get_path__(endpoint)
+        mount = path_normalizer.get_path(getattr(endpoint, 'include_prefix', ''))
+        base_path = self.base_path.lstrip("/")
+        if base_path and path.startswith(base_path):
+            path = path[len(base_path):]
+            if mount.startswith(base_path):
+                mount = mount[len(base_path):]
+            else:  # mounted within the base path
+                mount = ""
+        if not path.startswith(mount):
+            mount = ""
+
+        rest = path[len(mount):]
+        sub = ""
+        if "/" in rest:
+            rest, sub = rest.split("/", 1)
+        return mount + rest, sub
+
+    def _get_resource_endpoints(self):
+        """
+        Groups the endpoints by resource path, expanding the view's
+        param_mappings. Returns an ordered dictionary of lists of
+        (endpoint, sub path, excluded parameter)
+        """
+        resources = OrderedDict()
         for endpoint in self.urlpatterns:
             if endpoint.callback:
-                path =  self.__get_path__(endpoint)
-                sub = ""
-                if "/" in path:
-                    split = path.split("/", 1)
-                    path = split[0]
-                    sub = split[1]
-
-                #handle substitutions
-                if hasattr(endpoint.callback.cls, 'param_mappings'):
-                    param_mappings = endpoint.callback.cls.param_mappings
-                    for key, value in param_mappings.iteritems():
-                        parameter = "{"+ key + "}"
-                        if parameter in path:
-                            for substitute in value:
-                                self.generate_api(
-                                    base_api,
-                                    path.replace(parameter, substitute),
-                                    endpoint,
-                                    sub,
-                                    exclude_param=key
-                                )
-                else:
-                    self.generate_api(base_api, path, endpoint, sub)
-        return base_api
\ No newline at end of file
+                path, sub = self._split_path(endpoint)
+
+                #handle substitutions, anywhere in the path
+                mapped = False
+                param_mappings = getattr(endpoint.callback.cls, 'param_mappings', None) or {}
+                for key, value in param_mappings.iteritems():
+                    parameter = "{"+ key + "}"
+                    if parameter in path:
+                        for substitute in value:
+                            resources.setdefault(path.replace(parameter, substitute), []).append(
+                                (endpoint, sub, key))
+                        mapped = True
+                    elif parameter in sub:
+                        for substitute in value:
+                            resources.setdefault(path, []).append(
+                                (endpoint, sub.replace(parameter, substitute), key))
+                        mapped = True
+                if not mapped:
+                    resources.setdefault(path, []).append((endpoint, sub, None))
+        return resources
@@ -0,0 +1,515 @@
+import copy
+import os
+import shutil
+import tempfile
+import time
+from StringIO import StringIO
+from django.conf.urls import include, patterns, url
+from django.core.cache import get_cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from rest_framework.response import Response
+from rest_framework.urlpatterns import format_suffix_patterns
+from rest_framework.views import APIView
+from rest_framework_docs.cache import CacheLock, DocumentationCache, prewarm_docs
+from rest_framework_docs.build import DocumentationBuild
+from rest_framework_docs.docs import DocumentationGenerator, parse_docstring, trim_docstring
+from rest_framework_docs.index import DocumentationIndex
+from rest_framework_docs.profiling import GenerationProfile
+from rest_framework_docs.signals import docs_profiled
+from rest_framework_docs.snapshot import DocumentationSnapshot
+from rest_framework_docs.swagger import (SwaggerDocumentationGenerator, SwaggerModelRegistry,
+                                         SwaggerOperationObject, SwaggerParameter)
+
+
+class KindView(APIView):
+    """
+    Gets the records of a kind
+
+    GET: Lists the records of the kind
+    """
+    param_mappings = {'kind': ['red', 'blue']}
+
+    def get(self, request, kind):
+        return Response([])
+
+
+included_urlpatterns = patterns('',
+    url(r'^(?P<kind>[a-z]+)-records/?$', KindView.as_view(), name='kind_records'),
+    url(r'^records/(?P<kind>[a-z]+)/?$', KindView.as_view(), name='records_of_kind'),
+)
+
+urlpatterns = patterns('',
+    url(r'^api/v1/', include(included_urlpatterns)),
+)
+
+
+@override_settings(ROOT_URLCONF='rest_framework_docs.tests')
+class IncludedPatternsTest(TestCase):
+
+    def test_paths_include_the_prefix(self):
+        docs = DocumentationGenerator().get_docs(as_objects=True)
+        self.assertEqual([doc.path for doc in docs],
+                         ['api/v1/records/{kind}', 'api/v1/{kind}-records'])
+
+    def test_mapped_endpoints_give_resources(self):
+        generator = SwaggerDocumentationGenerator(lazy=False)
+        resources = generator.base_api.children
+        self.assertEqual([resource.path for resource in resources],
+                         ['api/v1/red-records', 'api/v1/blue-records', 'api/v1/records'])
+        self.assertEqual([api.path for api in resources[2].children], ['red', 'blue'])
+
+
+class UniquePatternsTest(TestCase):
+
+    def filter(self, urlpatterns):
+        generator = DocumentationGenerator(urlpatterns=[])
+        return [pattern.regex.pattern for pattern in generator._filter_unique_patterns(urlpatterns)]
+
+    def test_duplicate_names_are_dropped_when_apart(self):
+        urlpatterns = patterns('',
+            url(r'^records/(?P<kind>[a-z]+)/?$', KindView.as_view(), name='records'),
+            url(r'^(?P<kind>[a-z]+)-records/?$', KindView.as_view(), name='kind_records'),
+            url(r'^records/(?P<kind>[a-z]+)$', KindView.as_view(), name='records'),
+        )
+        self.assertEqual(self.filter(urlpatterns),
+                         [r'^records/(?P<kind>[a-z]+)/?$', r'^(?P<kind>[a-z]+)-records/?$'])
+
+    def test_format_suffix_variants_are_dropped(self):
+        urlpatterns = format_suffix_patterns(patterns('',
+            url(r'^records/(?P<kind>[a-z]+)/$', KindView.as_view(), name='records'),
+        ))
+        self.assertEqual(self.filter(list(reversed(urlpatterns))),
+                         [r'^records/(?P<kind>[a-z]+)/$'])
+
+    def test_unnamed_patterns_are_kept_by_path(self):
+        urlpatterns = patterns('',
+            url(r'^records/(?P<kind>[a-z]+)/?$', KindView.as_view()),
+            url(r'^(?P<kind>[a-z]+)-records/?$', KindView.as_view()),
+        )
+        self.assertEqual(len(self.filter(urlpatterns)), 2)
+
+    def test_other_dotted_parameters_are_not_format_suffixes(self):
+        urlpatterns = patterns('',
+            url(r'^files/(?P<kind>[^.]+)\.(?P<ext>[a-z]+)$', KindView.as_view(), name='files'),
+            url(r'^files/(?P<kind>[^.]+)$', KindView.as_view(), name='files'),
+        )
+        self.assertEqual(len(self.filter(urlpatterns)), 2)
+
+
+class CountingGenerator(DocumentationGenerator):
+
+    builds = 0
+
+    def update_docs(self, previous=None):
+        CountingGenerator.builds += 1
+        return super(CountingGenerator, self).update_docs(previous)
+
+
+class DroppingCache(LocMemCache):
+    """ Drops the documentation, as memcached does with oversized values """
+
+    def set(self, key, value, *args, **kwargs):
+        if not key.endswith(':docs'):
+            super(DroppingCache, self).set(key, value, *args, **kwargs)
+
+
+def wait_for_revalidation(cache, timeout=10):
+    deadline = time.time() + timeout
+    while cache._revalidating and time.time() < deadline:
+        time.sleep(0.01)
+
+
+@override_settings(ROOT_URLCONF='rest_framework_docs.tests',
+                   CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                       'LOCATION': 'rest_framework_docs.tests'}},
+                   REST_FRAMEWORK_DOCS={'CACHE_BACKEND': 'default', 'SHARED_BUILD': True})
+class SharedBuildTest(TestCase):
+
+    def setUp(self):
+        get_cache('default').clear()
+        CountingGenerator.builds = 0
+
+    def test_processes_share_one_build(self):
+        docs = DocumentationCache(CountingGenerator).get_docs()
+        self.assertEqual([doc.path for doc in DocumentationCache(CountingGenerator).get_docs()],
+                         [doc.path for doc in docs])
+        self.assertEqual(CountingGenerator.builds, 1)
+
+    def test_waiters_get_the_previous_version(self):
+        previous = DocumentationCache(CountingGenerator).get_docs()
+        cache = DocumentationCache(CountingGenerator)
+        cache._fingerprint = 'next'  # as if the code changed
+        lock = CacheLock(get_cache('default'), cache._key('lock'), 60)
+        self.assertTrue(lock.acquire())  # another process is building it
+        try:
+            docs = cache.get_docs()
+        finally:
+            lock.release()
+        self.assertEqual([doc.path for doc in docs], [doc.path for doc in previous])
+        self.assertEqual(CountingGenerator.builds, 1)
+
+    @override_settings(REST_FRAMEWORK_DOCS={'CACHE_BACKEND': 'default', 'SHARED_BUILD': True,
+                                            'SERVE_STALE': True})
+    def test_revalidation_waits_for_the_lock(self):
+        cache = DocumentationCache(CountingGenerator)
+        docs = cache.get_docs()
+        lock = CacheLock(get_cache('default'), cache._key('lock'), 60)
+        self.assertTrue(lock.acquire())  # another process is building it
+        try:
+            cache.invalidate()
+            wait_for_revalidation(cache)
+            self.assertIs(cache.get_docs(), docs)
+        finally:
+            lock.release()
+        self.assertEqual(CountingGenerator.builds, 1)
+
+    @override_settings(REST_FRAMEWORK_DOCS={'CACHE_BACKEND': 'default', 'SERVE_STALE': True})
+    def test_invalidation_revalidates_once(self):
+        cache = DocumentationCache(CountingGenerator)
+        docs = cache.get_docs()
+        with cache._lock:  # keeps the revalidation from storing the new docs
+            cache.invalidate()
+            for request in range(5):
+                self.assertIs(cache.get_docs(), docs)
+        wait_for_revalidation(cache)
+        self.assertEqual(CountingGenerator.builds, 2)
+
+    def test_lock_expires(self):
+        backend = get_cache('default')
+        lock = CacheLock(backend, 'lock', 1)
+        other = CacheLock(backend, 'lock', 1)
+        self.assertTrue(lock.acquire())
+        self.assertFalse(other.acquire())
+        other.release()
+        self.assertEqual(backend.get('lock'), lock.token)
+
+        time.sleep(1.5)
+        self.assertTrue(other.acquire())
+        lock.release()
+        self.assertEqual(backend.get('lock'), other.token)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'rest_framework_docs.tests.DroppingCache',
+                                           'LOCATION': 'rest_framework_docs.tests.dropping'}})
+    def test_unstored_docs_are_not_rebuilt(self):
+        cache = DocumentationCache(CountingGenerator)
+        cache.get_docs()
+        cache.get_docs()
+        self.assertEqual(CountingGenerator.builds, 1)
+        self.assertEqual(get_cache('default').get(cache._key('version')), None)
+
+
+class PrewarmTest(TestCase):
+
+    @override_settings(REST_FRAMEWORK_DOCS={'BUILD_DIR': '/nonexistent'})
+    def test_prebuilt_files_are_not_prewarmed(self):
+        self.assertEqual(prewarm_docs(), None)
+
+
+@override_settings(ROOT_URLCONF='rest_framework_docs.tests')
+class BuildCommandTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_build_writes_the_files(self):
+        call_command('build_api_docs', output=self.directory, profile=True, stdout=StringIO())
+        build = DocumentationBuild(self.directory)
+        self.assertTrue(os.path.exists(build.html_filename()))
+        self.assertEqual(len(build.get_index().docs), 2)
+        self.assertTrue(os.path.exists(build.swagger_filename('api/v1/records')))
+
+    def test_snapshot_writes_the_documents(self):
+        filename = os.path.join(self.directory, 'docs.snapshot')
+        call_command('build_api_docs', snapshot=filename, profile=True, stdout=StringIO())
+        data, table, last_modified = DocumentationSnapshot(filename)._map()
+        self.assertTrue(DocumentationSnapshot.HTML in table)
+        self.assertTrue(DocumentationSnapshot.swagger_name('api/v1/records') in table)
+        self.assertEqual(len(DocumentationSnapshot(filename).get_index().docs), 2)
+
+
+def previous_parse_docstring(docstring):
+    """ The parser parse_docstring replaced, which it must agree with """
+    description = trim_docstring(docstring)
+    split_lines = description.split('\n')
+    trimmed = False
+    _params = []
+
+    for line in split_lines:
+        if not trimmed:
+            needle = line.find('--')
+            if needle != -1:
+                trim_at = description.find(line)
+                description = description[:trim_at]
+                trimmed = True
+
+        params = line.split(' -- ')
+        if len(params) == 2:
+            _params.append([params[0].strip(), params[1].strip()])
+    description = description.rstrip('\n')
+    return {'description': description, 'params': _params}
+
+
+DOCSTRINGS = (
+    None,
+    "",
+    "Gets a cigar",
+    """
+    Gets the cigars
+    """,
+    """
+    Gets the cigars
+
+    of a manufacturer
+    """,
+    """
+    Gets the cigars
+
+    name -- query, string, name of the cigar
+    length -- query, integer, length of the cigar, optional
+    """,
+    """
+    Lists or creates cigars
+
+    GET: Lists the cigars
+    POST: Creates a cigar
+
+    name -- the name
+    """,
+    """
+    Gets the cigars -- of a manufacturer
+    name -- the name
+    """,
+    """
+    Gets the cigars
+    ---
+    name -- the name -- of the cigar
+    \tlength -- the length
+    """,
+)
+
+
+class ParseDocstringTest(TestCase):
+
+    def test_matches_the_previous_parser(self):
+        for docstring in DOCSTRINGS:
+            parsed = parse_docstring(docstring)
+            self.assertEqual({'description': parsed['description'], 'params': parsed['params']},
+                             previous_parse_docstring(docstring))
+
+    def test_description_ends_at_the_first_dashes(self):
+        parsed = parse_docstring("""
+        Gets the cigars
+        of a manufacturer
+        ---
+        More details
+        """)
+        self.assertEqual(parsed['description'], "Gets the cigars\nof a manufacturer")
+
+    def test_params(self):
+        parsed = parse_docstring(DOCSTRINGS[5])
+        self.assertEqual(parsed['params'], [
+            ['name', 'query, string, name of the cigar'],
+            ['length', 'query, integer, length of the cigar, optional'],
+        ])
+
+    def test_method_sections(self):
+        parsed = parse_docstring(DOCSTRINGS[6])
+        self.assertEqual(parsed['methods'], {'GET': 'Lists the cigars', 'POST': 'Creates a cigar'})
+        self.assertEqual(parse_docstring(DOCSTRINGS[3])['methods'], {})
+
+    @override_settings(ROOT_URLCONF='rest_framework_docs.tests')
+    def test_cached_result_is_returned_unchanged(self):
+        parsed = parse_docstring(KindView.__doc__)
+        expected = copy.deepcopy(parsed)
+        DocumentationGenerator().get_docs()
+        generator = SwaggerDocumentationGenerator(lazy=False)
+        for resource in generator.base_api.children:
+            generator.get_docs(resource.path)
+        self.assertIs(parse_docstring(KindView.__doc__), parsed)
+        self.assertEqual(parsed, expected)
+        self.assertEqual(parsed['methods'], {'GET': 'Lists the records of the kind'})
+
+
+def make_doc(path, title, model, methods, description='', params=None, fields=None):
+    return {'path': path, 'title': title, 'model': model, 'allowed_methods': methods,
+            'description': description, 'params': params or [], 'fields': fields}
+
+
+INDEXED_DOCS = [
+    make_doc('manufacturers/{pk}', 'Manufacturer Detail', 'Manufacturer', ['GET', 'PUT']),
+    make_doc('cigars', 'Cigar List', 'Cigar', ['GET', 'POST'], 'Lists the cigars',
+             params=[['name', 'query, string, name of the cigar']],
+             fields=[{'length': {'type': 'Integer Field'}}]),
+    make_doc('countries', 'Country List', None, ['GET'], 'Lists the countries'),
+    make_doc('cigars/{pk}', 'Cigar Detail', 'Cigar', ['GET', 'PUT', 'DELETE'], 'Gets a cigar'),
+    make_doc('manufacturers', 'Manufacturer List', 'Manufacturer', ['GET'],
+             'Lists the manufacturers of cigars'),
+    make_doc('cigarillos', 'Cigarillo List', 'Cigar', ['GET']),
+]
+
+
+class DocumentationIndexTest(TestCase):
+
+    def setUp(self):
+        self.index = DocumentationIndex(INDEXED_DOCS)
+
+    def paths(self, results):
+        return [doc['path'] for doc in results]
+
+    def test_path_prefix(self):
+        page = self.index.query(path='cigars')
+        self.assertEqual(page['count'], 2)
+        self.assertEqual(self.paths(page['results']), ['cigars', 'cigars/{pk}'])
+        self.assertEqual(self.paths(self.index.query(path='cigar')['results']),
+                         ['cigarillos', 'cigars', 'cigars/{pk}'])
+        self.assertEqual(self.index.query(path='z')['count'], 0)
+
+    def test_pagination(self):
+        page = self.index.query(offset=4, limit=5)
+        self.assertEqual(page['count'], 6)
+        self.assertEqual(self.paths(page['results']), ['manufacturers', 'manufacturers/{pk}'])
+        self.assertEqual(self.index.query(offset=10)['results'], [])
+
+    def test_combined_filters_with_pagination(self):
+        page = self.index.query(path='cigar', model='Cigar', method='get', offset=1, limit=1)
+        self.assertEqual(page['count'], 3)
+        self.assertEqual(self.paths(page['results']), ['cigars'])
+        page = self.index.query(model='Cigar', method='PUT')
+        self.assertEqual(self.paths(page['results']), ['cigars/{pk}'])
+        page = self.index.query(path='manufacturers', model='Cigar')
+        self.assertEqual((page['count'], page['results']), (0, []))
+
+    def test_fields(self):
+        page = self.index.query(path='countries', fields=['path', 'model', 'unknown'])
+        self.assertEqual(page['results'], [{'path': 'countries', 'model': None}])
+
+    def test_search_ranks_prefix_matches_lower(self):
+        results = self.index.search('cigar')
+        self.assertEqual([(score, doc['path']) for score, doc in results], [
+            (5, 'cigars'),  # title, and the description of a parameter
+            (5, 'cigars/{pk}'),  # title and description
+            (2, 'cigarillos'),  # cigarillo and cigarillos, as prefix matches
+            (0.5, 'manufacturers'),
+        ])
+        self.assertEqual(len(self.index.search('cigar', limit=2)), 2)
+
+    def test_search_matches_every_word(self):
+        results = self.index.search('cigar list')
+        self.assertEqual([doc['path'] for score, doc in results], ['cigars'])
+        self.assertEqual(self.index.search('cigar unknown'), [])
+        self.assertEqual(self.index.search(' '), [])
+
+    def test_search_weights_field_names(self):
+        self.assertEqual([(score, doc['path']) for score, doc in self.index.search('length')],
+                         [(2, 'cigars')])
+
+
+class ModelsApi(object):
+    """ The models and operations of a swagger Api """
+
+    def __init__(self, models=None, response_class=None, data_type=None):
+        self.models = models
+        operation = SwaggerOperationObject(response_class=response_class)
+        if data_type is not None:
+            operation.add_parameter(SwaggerParameter(data_type=data_type))
+        self.operations = [operation]
+
+
+CIGAR = {'id': 'Cigar', 'properties': {'manufacturer': {'type': 'Manufacturer'}}}
+MANUFACTURER = {'id': 'Manufacturer', 'properties': {'country': {'$ref': 'Country'}}}
+COUNTRY = {'id': 'Country', 'properties': {'name': {'type': 'string'}}}
+
+
+class SwaggerModelRegistryTest(TestCase):
+
+    def setUp(self):
+        self.registry = SwaggerModelRegistry()
+        self.registry.register({'Manufacturer': MANUFACTURER, 'Country': COUNTRY})
+
+    def test_identical_definitions_are_shared(self):
+        registered = self.registry.register({'Country': dict(COUNTRY)})
+        self.assertIs(registered['Country'], self.registry.get('Country'))
+        self.assertEqual(self.registry.conflicts, {})
+
+    def test_conflicting_definitions(self):
+        other = {'id': 'Country', 'properties': {'code': {'type': 'string'}}}
+        registered = self.registry.register({'Country': other})
+        self.assertEqual(registered['Country'], other)
+        self.assertEqual(self.registry.get('Country'), COUNTRY)
+        self.assertEqual(self.registry.conflicts, {'Country': [COUNTRY, other]})
+
+    def test_references_are_followed(self):
+        models = self.registry.get_models([ModelsApi({'Cigar': CIGAR}, response_class='List[Cigar]')])
+        self.assertEqual(models, {'Cigar': CIGAR, 'Manufacturer': MANUFACTURER, 'Country': COUNTRY})
+        models = self.registry.get_models([ModelsApi(data_type='Manufacturer')])
+        self.assertEqual(sorted(models), ['Country', 'Manufacturer'])
+
+    def test_own_definitions_take_precedence(self):
+        own = {'id': 'Country', 'properties': {'code': {'type': 'string'}}}
+        models = self.registry.get_models([ModelsApi({'Country': own}, response_class='Manufacturer')])
+        self.assertEqual(models['Country'], own)
+
+    def test_declared_models_are_kept_unreferenced(self):
+        models = self.registry.get_models([ModelsApi({'Cigar': CIGAR}, response_class='string')])
+        self.assertEqual(sorted(models), ['Cigar', 'Country', 'Manufacturer'])
+        self.assertEqual(self.registry.get_models([ModelsApi(response_class='Unknown')]), {})
+
+
+@override_settings(ROOT_URLCONF='rest_framework_docs.tests')
+class SwaggerProfileTest(TestCase):
+
+    def setUp(self):
+        self.reports = []
+        docs_profiled.connect(self.receive, sender=SwaggerDocumentationGenerator)
+
+    def tearDown(self):
+        docs_profiled.disconnect(self.receive, sender=SwaggerDocumentationGenerator)
+
+    def receive(self, generator, **kwargs):
+        self.reports.append(generator)
+
+    def build(self, generator):
+        generator.get_docs()
+        for resource in generator.base_api.children:
+            generator.get_docs(resource.path)
+
+    def test_reported_once_per_build(self):
+        generator = SwaggerDocumentationGenerator(lazy=False, profile=GenerationProfile())
+        self.build(generator)
+        self.assertEqual(self.reports, [generator])
+
+    def test_lazy_build_is_reported_once_complete(self):
+        generator = SwaggerDocumentationGenerator(lazy=True, profile=GenerationProfile())
+        generator.get_docs('api/v1/records')
+        self.assertEqual(self.reports, [])
+        self.build(generator)
+        self.build(generator)
+        self.assertEqual(self.reports, [generator])
+
+
+@override_settings(ROOT_URLCONF='rest_framework_docs.tests')
+class SwaggerRefreshTest(TestCase):
+
+    def test_lazy_resources_are_fingerprinted_when_generated(self):
+        generator = SwaggerDocumentationGenerator(lazy=True)
+        self.assertEqual(generator._resource_fingerprints, {})
+        resource = generator.get_resource('api/v1/records')
+        self.assertEqual(list(generator._resource_fingerprints), ['api/v1/records'])
+
+        generator.refresh()
+        self.assertIs(generator.base_api.get_child('api/v1/records'), resource)
+        self.assertEqual(list(generator._resource_fingerprints), ['api/v1/records'])
+
+    def test_unchanged_resources_are_reused(self):
+        generator = SwaggerDocumentationGenerator(lazy=False)
+        resources = list(generator.base_api.children)
+        generator.refresh()
+        self.assertEqual(len(generator.base_api.children), len(resources))
+        for resource in resources:
+            self.assertIs(generator.base_api.get_child(resource.path), resource)
@@ -1,5 +1,5 @@
 from django.conf.urls import patterns, include, url
-from views import documentation
+from views import documentation, documentation_json, documentation_search, swagger_documentation
 
 # Uncomment the next two lines to enable the admin:
 # from django.contrib import admin
@@ -8,4 +8,8 @@ from views import documentation
 urlpatterns = patterns('',
     # Examples:
     url(r'^/?$', documentation, name='api-documentation'),
+    url(r'^json/$', documentation_json, name='api-documentation-json'),
+    url(r'^search/$', documentation_search, name='api-documentation-search'),
+    url(r'^swagger/$', swagger_documentation, name='api-swagger'),
+    url(r'^swagger/(?P<path>.+)/$', swagger_documentation, name='api-swagger-resource'),
 )
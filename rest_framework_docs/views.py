@@ -1,9 +1,152 @@
+import hashlib
 from docs import DocumentationGenerator
-from django.shortcuts import render_to_response
+from build import DocumentationBuild
+from cache import create_swagger_generator, docs_cache, get_cached_docs, get_swagger_generator
+from conf import get_setting
+from encoding import encode
+from index import DocumentationIndex
+from rendering import render_documentation_stream
+from snapshot import DocumentationSnapshot, get_snapshot
+from responses import (conditional_response, derive_etag, document_response,
+                       not_modified_response, set_validators)
+from django.http import HttpResponse, HttpResponseBadRequest
+try:
+    from django.http import StreamingHttpResponse
+except ImportError:  # Django < 1.5 streams iterators given to HttpResponse
+    StreamingHttpResponse = HttpResponse
+from django.template.loader import render_to_string
 from django.template.context import RequestContext
 
 
 def documentation(request, *args, **kwargs):
-    docs = DocumentationGenerator().get_docs(as_objects=True)
-    return render_to_response("rest_framework_docs/docs.html", {'docs': docs},
-                              context_instance=RequestContext(request))
+    build_dir = get_setting('BUILD_DIR')
+    if build_dir:
+        return DocumentationBuild(build_dir).serve_html(request)
+    if get_setting('SNAPSHOT_FILE'):
+        return get_snapshot().serve(request, DocumentationSnapshot.HTML)
+
+    if get_setting('CACHE_ENABLED'):
+        if get_setting('PRECOMPRESS'):
+            return document_response(request, docs_cache.get_html_document())
+        docs = get_cached_docs()
+    else:
+        docs = DocumentationGenerator().get_docs(as_objects=True)
+
+    context_instance = RequestContext(request)
+    if get_setting('STREAMING'):
+        # the page isn't known before it is sent, so it carries no ETag
+        response = StreamingHttpResponse(
+            render_documentation_stream(docs, context_instance=context_instance))
+        set_validators(response)
+        return response
+
+    # the page depends on the template and the request context as much as
+    # on the docs, so its tag is a hash of the page itself
+    content = render_to_string("rest_framework_docs/docs.html", {'docs': docs},
+                               context_instance=context_instance)
+    if isinstance(content, unicode):
+        content = content.encode('utf-8')
+    return conditional_response(request, content, 'text/html; charset=utf-8',
+                                etag=hashlib.md5(content).hexdigest())
+
+
+def swagger_documentation(request, path=None, *args, **kwargs):
+    build_dir = get_setting('BUILD_DIR')
+    if build_dir:
+        return DocumentationBuild(build_dir).serve_swagger(request, path)
+    if get_setting('SNAPSHOT_FILE'):
+        return get_snapshot().serve(request, DocumentationSnapshot.swagger_name(path))
+
+    if get_setting('CACHE_ENABLED'):
+        generator = get_swagger_generator()
+    else:
+        generator = create_swagger_generator()
+    return document_response(request, generator.get_document(path))
+
+
+def documentation_json(request, *args, **kwargs):
+    """
+    Gets a page of the documentation as JSON. Query parameters:
+
+    path -- Prefix of the endpoint paths
+    model -- Name of the endpoints' model
+    method -- HTTP method the endpoints allow
+    fields -- Comma separated keys to include for each endpoint
+    offset -- Number of endpoints to skip
+    limit -- Maximum number of endpoints to return. Defaults to PAGE_SIZE
+    """
+    try:
+        offset = int(request.GET.get('offset', 0))
+        limit = request.GET.get('limit')
+        limit = int(limit) if limit else get_setting('PAGE_SIZE')
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError
+    except ValueError:
+        return HttpResponseBadRequest("offset and limit must be positive integers")
+
+    index = get_documentation_index()
+    etag = derive_etag(index.etag, 'json', request.GET.urlencode())
+    response = not_modified_response(request, etag)
+    if response is not None:
+        return response
+
+    fields = request.GET.get('fields')
+    page = index.query(
+        path=request.GET.get('path', '').lstrip('/'),
+        model=request.GET.get('model'),
+        method=request.GET.get('method'),
+        offset=offset,
+        limit=limit,
+        fields=fields.split(',') if fields else None,
+    )
+    return conditional_response(request, encode(page), 'application/json', etag=etag)
+
+
+def documentation_search(request, *args, **kwargs):
+    """
+    Searches the documentation. Query parameters:
+
+    q -- Words to search for. The last one may be the beginning of a word
+    limit -- Maximum number of endpoints to return
+    fields -- Comma separated keys to include for each endpoint
+    """
+    try:
+        limit = request.GET.get('limit')
+        limit = int(limit) if limit else None
+        if limit is not None and limit < 0:
+            raise ValueError
+    except ValueError:
+        return HttpResponseBadRequest("limit must be a positive integer")
+
+    index = get_documentation_index()
+    etag = derive_etag(index.etag, 'search', request.GET.urlencode())
+    response = not_modified_response(request, etag)
+    if response is not None:
+        return response
+
+    query = request.GET.get('q', '')
+    fields = request.GET.get('fields')
+    fields = fields.split(',') if fields else None
+
+    results = []
+    for score, doc in index.search(query, limit=limit):
+        if fields:
+            doc = dict((field, doc[field]) for field in fields if field in doc)
+        else:
+            doc = dict(doc)
+        doc['score'] = score
+        results.append(doc)
+
+    return conditional_response(request, encode({'query': query, 'results': results}),
+                                'application/json', etag=etag)
+
+
+def get_documentation_index():
+    build_dir = get_setting('BUILD_DIR')
+    if build_dir:
+        return DocumentationBuild(build_dir).get_index()
+    if get_setting('SNAPSHOT_FILE'):
+        return get_snapshot().get_index()
+    if get_setting('CACHE_ENABLED'):
+        return docs_cache.get_index()
+    return DocumentationIndex.from_objects(DocumentationGenerator().get_docs(as_objects=True))
@@ -9,14 +9,13 @@ os.chdir(os.path.normpath(os.path.join(os.path.abspath(__file__), os.pardir)))
 setup(
     name='django-rest-framework-docs',
     version='0.1.3',
-    packages=['rest_framework_docs'],
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     package_data={'rest_framework_docs': ['templates/rest_framework_docs/*']},
     include_package_data=True,
     license='FreeBSD License',
     description='An inventory tool for Django Rest Framework v2 API endpoints.',
     long_description=README,
     install_requires=[
-        'jsonpickle>=0.4.0',
         'django>=1.4',
         'djangorestframework>=2.1.3'
     ],